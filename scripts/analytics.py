@@ -0,0 +1,94 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+# Right-closed duration buckets (minutes) used by the system evaluation
+DURATION_EDGES = np.array([10.0, 20.0, 30.0])
+DURATION_LABELS = ["0-10 minutes", "10-20 minutes", "20-30 minutes", ">30 minutes"]
+
+
+class ResponseColumns(NamedTuple):
+    worker_ids: np.ndarray  # unique worker ids, indexed by worker_codes
+    worker_codes: np.ndarray
+    question_ids: np.ndarray  # unique question ids, indexed by question_codes
+    question_codes: np.ndarray
+    times: np.ndarray  # datetime64[us]
+    is_faithful: np.ndarray
+    is_relevant: np.ndarray
+
+
+def _encode(values: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Dictionary-encodes in first-appearance order; much cheaper than np.unique on
+    # string arrays
+    codes: Dict[str, int] = {}
+    encoded = np.fromiter((codes.setdefault(v, len(codes)) for v in values), np.int64)
+    return np.array(list(codes), dtype=object), encoded
+
+
+def load_responses(responses: List[Dict[str, Any]]) -> ResponseColumns:
+    """
+    Converts responses, as returned by the /responses endpoint, into column arrays.
+    :param responses: the response objects
+    :return: one array per column, with ids encoded as integer codes
+    """
+    worker_ids, worker_codes = _encode(r["worker_id"] for r in responses)
+    question_ids, question_codes = _encode(r["question_id"] for r in responses)
+    return ResponseColumns(
+        worker_ids=worker_ids,
+        worker_codes=worker_codes,
+        question_ids=question_ids,
+        question_codes=question_codes,
+        times=np.array([r["time"] for r in responses], dtype="datetime64[us]"),
+        is_faithful=np.array([r["is_faithful"] for r in responses], dtype=bool),
+        is_relevant=np.array([r["is_relevant"] for r in responses], dtype=bool),
+    )
+
+
+def worker_durations(columns: ResponseColumns) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the time between each worker's first and last response.
+    :param columns: the loaded responses
+    :return: the worker ids and their durations in minutes
+    """
+    if len(columns.times) == 0:
+        return columns.worker_ids, np.zeros(0)
+    order = np.argsort(columns.worker_codes, kind="stable")
+    codes = columns.worker_codes[order]
+    times = columns.times[order].astype(np.int64)
+    # Start of each worker's run of rows in the sorted arrays
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    spans = np.maximum.reduceat(times, starts) - np.minimum.reduceat(times, starts)
+    return columns.worker_ids[codes[starts]], spans / 60e6
+
+
+def duration_buckets(minutes: np.ndarray) -> Dict[str, int]:
+    """
+    Counts durations per bucket of DURATION_LABELS, with each bucket closed on the right.
+    :param minutes: durations in minutes
+    :return: the number of durations per bucket label
+    """  # noqa: E501
+    # np.histogram closes bins on the left, so place values with searchsorted
+    counts = np.bincount(
+        np.searchsorted(DURATION_EDGES, minutes[minutes >= 0], side="left"),
+        minlength=len(DURATION_LABELS),
+    )
+    return dict(zip(DURATION_LABELS, counts.tolist()))
+
+
+def score_agreement(
+    results: Dict[str, Dict[str, Any]],
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Compares measured and perceived scores of every question, truncating them to integers.
+    :param results: the contents of results.json
+    :return: the question ids, and per question whether relevancy and faithfulness agree
+    """  # noqa: E501
+    keys = list(results)
+
+    def column(name: str) -> np.ndarray:
+        values = np.array([results[key][name] for key in keys], dtype=float)
+        return np.trunc(values)
+
+    relevance = column("measured_relevancy") == column("perceived_relevancy")
+    faithfulness = column("measured_faithfulness") == column("perceived_faithfulness")
+    return keys, relevance, faithfulness
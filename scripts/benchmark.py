@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import os
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+root = Path(__file__).parent.parent
+dataset_path = root / "data" / "dataset.json"
+results_dir = root / "benchmarks"
+
+FIELDS = ["query", "context1", "context2", "response"]
+SHED_STATUSES = {429, 503}
+
+
+def field_lengths():
+    # Sample synthetic text lengths from the real dataset when it is available
+    if not dataset_path.exists():
+        return {field: [2000] for field in FIELDS}
+    with open(dataset_path, "r", encoding="utf-8") as dataset_file:
+        dataset = json.load(dataset_file)
+    snippets = [q["context_snippets"] + ["", ""] for q in dataset]
+    return {
+        "query": [len(q["query"]) for q in dataset],
+        "context1": [len(s[0]) for s in snippets],
+        "context2": [len(s[1]) for s in snippets],
+        "response": [len(q["response"]) for q in dataset],
+    }
+
+
+def synthetic_question(lengths, rng):
+    alphabet = string.ascii_letters + "     "
+    return {
+        field: "".join(rng.choices(alphabet, k=rng.choice(lengths[field])))[:10000]
+        for field in FIELDS
+    }
+
+
+def synthetic_response(question_id, rng):
+    return {
+        "question_id": question_id,
+        "worker_id": f"w{rng.randrange(10**6):06d}",
+        "is_faithful": rng.random() < 0.5,
+        "is_relevant": rng.random() < 0.5,
+        "faithfulness": "x" * rng.randrange(20, 400),
+        "relevance": "y" * rng.randrange(20, 400),
+        "comments": "",
+    }
+
+
+def start_server(database_url, port):
+    """
+    Starts create_app() on a background thread against the given database.
+    :param database_url: SQLAlchemy URL of the local database stand-in
+    :param port: local port to listen on
+    :return: the running server
+    """
+    from werkzeug.serving import make_server
+
+    # Per-request access lines would dominate the output and the timings
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(root / "src"))
+    from app import create_app
+
+    server = make_server("127.0.0.1", port, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed(session, base_url, questions, responses, rng):
+    lengths = field_lengths()
+    ids = []
+    for start in range(0, questions, 500):
+        batch = [
+            synthetic_question(lengths, rng) for _ in range(min(500, questions - start))
+        ]
+        result = session.post(f"{base_url}/questions/bulk", json=batch).json()
+        ids.extend(item["id"] for item in result["results"])
+    for start in range(0, responses, 1000):
+        batch = [
+            synthetic_response(rng.choice(ids), rng)
+            for _ in range(min(1000, responses - start))
+        ]
+        session.post(f"{base_url}/responses/batch", json=batch)
+    return ids
+
+
+def endpoints(question_ids, rng):
+    # name -> function producing (method, path, json body) for one request
+    return {
+        "GET /questions/random": lambda: ("GET", "/questions/random", None),
+        "GET /questions/assign": lambda: (
+            "GET",
+            f"/questions/assign?worker_id=b{rng.randrange(10**6)}",
+            None,
+        ),
+        "GET /questions": lambda: ("GET", "/questions?limit=100", None),
+        "GET /questions/<id>": lambda: (
+            "GET",
+            f"/questions/{rng.choice(question_ids)}",
+            None,
+        ),
+        "POST /responses": lambda: (
+            "POST",
+            "/responses",
+            synthetic_response(rng.choice(question_ids), rng),
+        ),
+        "GET /responses": lambda: ("GET", "/responses?limit=100", None),
+        "POST /counter/increment": lambda: ("POST", "/counter/increment", None),
+        "GET /counter": lambda: ("GET", "/counter", None),
+        "GET /stats/questions": lambda: ("GET", "/stats/questions", None),
+    }
+
+
+def run_endpoint(session, base_url, make_request, requests_count, concurrency):
+    """
+    Sends requests_count requests to one endpoint from concurrency threads.
+    :return: throughput, latency percentiles (ms) and the number of failures
+    """
+    planned = [make_request() for _ in range(requests_count)]
+
+    def send(planned_request):
+        method, path, body = planned_request
+        start = time.perf_counter()
+        response = session.request(method, f"{base_url}{path}", json=body)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(send, planned))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in outcomes]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    statuses = [status for _, status in outcomes]
+    return {
+        "requests": requests_count,
+        # Requests turned away by admission control are counted apart from errors
+        "shed": sum(1 for status in statuses if status in SHED_STATUSES),
+        "errors": sum(
+            1 for status in statuses if status >= 400 and status not in SHED_STATUSES
+        ),
+        "throughput_rps": requests_count / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+    }
+
+
+def print_report(report, baseline=None):
+    print(
+        f"{'endpoint':<26}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'shed':>6}"
+        f"{'err':>6}"
+    )
+    for name, stats in report["endpoints"].items():
+        line = (
+            f"{name:<26}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.2f}"
+            f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+            f"{stats.get('shed', 0):>6}{stats['errors']:>6}"
+        )
+        if baseline and name in baseline["endpoints"]:
+            before = baseline["endpoints"][name]["p95_ms"]
+            line += f"   p95 {100 * (stats['p95_ms'] - before) / before:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API routes.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument("--questions", type=int, default=263)
+    parser.add_argument("--responses", type=int, default=2000)
+    parser.add_argument(
+        "--endpoint", action="append", help="only run endpoints containing this"
+    )
+    parser.add_argument(
+        "--database-url", help="database to use instead of a temporary SQLite file"
+    )
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", help="where to save the results as JSON")
+    parser.add_argument("--compare", help="earlier results to compare p95 against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/benchmark.db"
+        server = start_server(database_url, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=args.concurrency))
+        question_ids = seed(session, base_url, args.questions, args.responses, rng)
+
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                k: v for k, v in vars(args).items() if k not in ("output", "compare")
+            },
+            "endpoints": {},
+        }
+        for name, make_request in endpoints(question_ids, rng).items():
+            if args.endpoint and not any(e in name for e in args.endpoint):
+                continue
+            report["endpoints"][name] = run_endpoint(
+                session, base_url, make_request, args.requests, args.concurrency
+            )
+        server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(report, baseline)
+
+    stamp = datetime.fromisoformat(report["timestamp"]).strftime("%Y%m%dT%H%M%S")
+    output = args.output or results_dir / f"{stamp}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=4)
+    print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
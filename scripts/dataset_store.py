@@ -0,0 +1,151 @@
+import hashlib
+import json
+import mmap
+from pathlib import Path
+
+data_dir = Path(__file__).parent.parent / "data"
+dataset_path = data_dir / "dataset.json"
+store_path = data_dir / "dataset.ndjson"
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_FORMAT = 2
+
+
+def pair_key(query, response):
+    # Identifies a record by its query/response pair, which the API also knows
+    return hashlib.sha256(f"{query}\0{response}".encode("utf-8")).hexdigest()
+
+
+def index_path_for(path):
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def build_index(path):
+    """
+    Writes the sidecar index of an NDJSON dataset, mapping each record id to the byte offset and length of its line, and each query/response pair to the ids of its records.
+    :param path: the NDJSON dataset, one record per line
+    :return: the path of the written index
+    """  # noqa: E501
+    records, pairs = {}, {}
+    offset = 0
+    with open(path, "rb") as data_file:
+        for line in data_file:
+            if line.strip():
+                record = json.loads(line)
+                records[record["id"]] = [offset, len(line)]
+                key = pair_key(record["query"], record["response"])
+                pairs.setdefault(key, []).append(record["id"])
+            offset += len(line)
+
+    index_path = index_path_for(path)
+    with open(index_path, "w", encoding="utf-8") as index_file:
+        json.dump(
+            {"format": INDEX_FORMAT, "records": records, "pairs": pairs}, index_file
+        )
+    return index_path
+
+
+def convert(json_path=dataset_path, path=store_path):
+    """
+    Converts a dataset in the JSON-array format of dataset.json into an NDJSON store with its index.
+    :param json_path: the JSON-array dataset
+    :param path: where to write the NDJSON store; the index is written next to it
+    """  # noqa: E501
+    with open(json_path, "r", encoding="utf-8") as json_file:
+        dataset = json.load(json_file)
+    with open(path, "w", encoding="utf-8") as data_file:
+        for record in dataset:
+            data_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+    build_index(path)
+
+
+class DatasetStore:
+    """
+    Random access to the records of an NDJSON dataset through its sidecar index.
+    Only the requested lines are read from the memory-mapped file and parsed.
+
+    Usage:
+        with DatasetStore() as store:
+            question = store.get("Q42")
+            labeled = store.find(question["query"], question["response"])
+    """
+
+    def __init__(self, path=store_path):
+        with open(index_path_for(path), "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+        assert (
+            index["format"] == INDEX_FORMAT
+        ), "Unsupported dataset index format, rebuild it with build_index()!"
+        self._records = index["records"]
+        self._pairs = index["pairs"]
+        # Index order is file order, which range() relies on
+        self._ids = list(self._records)
+        self._positions = {id_: pos for pos, id_ in enumerate(self._ids)}
+
+        self._file = open(path, "rb")
+        # An empty file cannot be mapped, and has no records to read anyway
+        self._mmap = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._records
+            else None
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id_):
+        return id_ in self._records
+
+    def ids(self):
+        return list(self._ids)
+
+    def get(self, id_):
+        offset, length = self._records[id_]
+        return json.loads(self._mmap[offset : offset + length])
+
+    def get_many(self, ids):
+        return [self.get(id_) for id_ in ids]
+
+    def find(self, query, response):
+        """
+        Reads the records of a query/response pair.
+        :param query: the query of the record
+        :param response: the response of the record
+        :return: the matching records, in file order; empty if there are none
+        """
+        return self.get_many(self._pairs.get(pair_key(query, response), []))
+
+    def range(self, first_id, last_id):
+        """
+        Reads the records from first_id up to and including last_id, in file order.
+        :param first_id: id of the first record of the range
+        :param last_id: id of the last record of the range
+        :return: the records of the range
+        """
+        start = self._positions[first_id]
+        stop = self._positions[last_id] + 1
+        if stop <= start:
+            return []
+        # The lines of a range are contiguous, so parse them from a single slice
+        begin = self._records[first_id][0]
+        end_offset, end_length = self._records[last_id]
+        block = self._mmap[begin : end_offset + end_length]
+        return [json.loads(line) for line in block.splitlines() if line.strip()]
+
+
+if __name__ == "__main__":
+    convert()
+    with DatasetStore() as store:
+        print(f"Wrote {len(store)} records to {store_path}")
@@ -1,62 +1,190 @@
+import argparse
 import csv
 import json
 
+from dataset_store import build_index, pair_key
+
 query_response_pairs = "../data/query-response-pairs.json"
 measured_scores = "../data/response-metrics.csv"
 dataset_path = "../data/dataset.json"
+ndjson_dataset_path = "../data/dataset.ndjson"
+
+
+CHUNK_SIZE = 64 * 1024
+DELIMITERS = " \t\r\n,]}"
+
+
+def iter_json_object(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the (key, value) members of a top-level JSON object one at a time, reading the file in chunks.
+    :param file: text file containing a single JSON object
+    :param chunk_size: number of characters read at a time
+    :return: a generator over the members of the object
+    """  # noqa: E501
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip(*tokens):
+        # Skips whitespace and returns the next non-whitespace character
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                char = buffer[pos]
+                if tokens and char not in tokens:
+                    raise ValueError(f"Expected one of {tokens}, found {char!r}")
+                pos += 1
+                return char
+            if eof:
+                raise ValueError("Unexpected end of JSON input")
+            fill()
+
+    def decode():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number or literal is only complete once a delimiter follows it
+                complete = end < len(buffer) and (
+                    isinstance(value, (str, list, dict)) or buffer[end] in DELIMITERS
+                )
+                if complete or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    fill()
+    skip("{")
+    if skip() == "}":
+        return
+    pos -= 1
+    while True:
+        key = decode()
+        skip(":")
+        yield key, decode()
+        if skip(",", "}") == "}":
+            return
+
+
+def iter_pairs(path):
+    with open(path, "r", encoding="utf-8") as data_file:
+        for query, response_data in iter_json_object(data_file):
+            key = pair_key(query, response_data["response_text"])
+            yield key, (query, response_data)
+
+
+def iter_scores(path):
+    with open(path, "r", encoding="utf-8", newline="") as csv_file:
+        csv_reader = csv.reader(csv_file)
+        fields = next(csv_reader)
+
+        assert (
+            "Faithfulness" == fields[-2]
+        ), "No column for the measured faithfulness-score was found!"
+        assert (
+            "Relevancy" == fields[-1]
+        ), "No column for the measured relevancy-score was found!"
 
+        for row in csv_reader:
+            yield pair_key(row[0], row[1]), row
 
-data = {}
-with open(query_response_pairs, "r", encoding="utf-8") as data_file:
-    try:
-        data = json.load(data_file)
-    except json.JSONDecodeError as e:
-        print("Could not read JSON file:", e)
-
-csv_rows = []
-with open(measured_scores, "r", encoding="utf-8") as csv_file:
-    csv_reader = csv.reader(csv_file)
-    fields = next(csv_reader)
-
-    assert (
-        "Faithfulness" == fields[-2]
-    ), "No column for the measured faithfulness-score was found!"
-    assert (
-        "Relevancy" == fields[-1]
-    ), "No column for the measured relevancy-score was found!"
-
-    for line in csv_reader:
-        csv_rows.append(line)
-
-cross_check_queries = list(zip(data.keys(), map(lambda rs: rs[0], csv_rows)))
-assert all(
-    tup[0] == tup[1] for tup in cross_check_queries
-), "Mismatch in the queries from the two input-files!"
-
-cross_check_responses = list(
-    zip(
-        (data[key]["response_text"] for key in data.keys()),
-        map(lambda rs: rs[1], csv_rows),
+
+def iter_aligned(pairs, scores):
+    """
+    Joins the two inputs on their query/response key, in the order of the pairs.
+    CSV rows read ahead of their pair wait in a buffer until it shows up, so inputs
+    in the same order are joined in constant memory.
+    """
+    pending = {}
+    scores = iter(scores)
+    for key, pair in pairs:
+        while key not in pending:
+            if (item := next(scores, None)) is None:
+                raise AssertionError(
+                    f"No scores for the query {pair[0]!r}; mismatch in the queries"
+                    " or responses from the two input-files!"
+                )
+            score_key, row = item
+            assert (
+                score_key not in pending
+            ), f"Duplicate rows in the scores for the query {row[0]!r}"
+            pending[score_key] = row
+        yield pair, pending.pop(key)
+
+    # Rows left over have no pair, or repeat one that was already joined
+    unmatched = [row[0] for row in pending.values()]
+    unmatched += [row[0] for _, row in scores]
+    assert not unmatched, (
+        "Mismatch in the queries or responses from the two input-files, or duplicate"
+        f" rows in the scores, for the queries {unmatched}"
+    )
+
+
+def iter_records(pairs_path=query_response_pairs, scores_path=measured_scores):
+    """
+    Reads both inputs incrementally and numbers the records in the order of the
+    pairs file, so the Q{n} ids do not depend on the order of the CSV rows.
+    """
+    aligned = iter_aligned(iter_pairs(pairs_path), iter_scores(scores_path))
+    for idx, ((query, response_data), row) in enumerate(aligned):
+        yield {
+            "id": f"Q{idx + 1}",
+            "query": query,
+            "response": response_data["response_text"],
+            "context_snippets": list(
+                node["node_content"] for node in response_data["source_nodes"]
+            ),
+            "faithfulness": row[-2],
+            "relevancy": row[-1],
+        }
+
+
+def write_ndjson(records, path):
+    with open(path, "w", encoding="utf-8") as output_file:
+        for record in records:
+            output_file.write(json.dumps(record) + "\n")
+
+
+def write_json(records, path):
+    # Same bytes as json.dump(list(records), indent=4), one record at a time
+    with open(path, "w", encoding="utf-8") as output_file:
+        output_file.write("[")
+        empty = True
+        for record in records:
+            output_file.write("\n    " if empty else ",\n    ")
+            output_file.write(json.dumps(record, indent=4).replace("\n", "\n    "))
+            empty = False
+        output_file.write("]" if empty else "\n]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize the labeled dataset.")
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help=f"write one record per line, with its index, to {ndjson_dataset_path}",
     )
-)
-assert all(
-    tup[0] == tup[1] for tup in cross_check_responses
-), "Mismatch in the responses from the two input-files!"
-
-output_list = []
-for idx, tup in enumerate(zip(data.items(), csv_rows)):
-    query, response_data, row = tup[0][0], tup[0][1], tup[1]
-    current_object = {
-        "id": f"Q{idx + 1}",
-        "query": query,
-        "response": response_data["response_text"],
-        "context_snippets": list(
-            node["node_content"] for node in response_data["source_nodes"]
-        ),
-        "faithfulness": row[-2],
-        "relevancy": row[-1],
-    }
-    output_list.append(current_object)
-
-with open(dataset_path, "w", encoding="utf-8") as output_file:
-    json.dump(output_list, output_file, indent=4)
+    args = parser.parse_args()
+
+    if args.ndjson:
+        write_ndjson(iter_records(), ndjson_dataset_path)
+        build_index(ndjson_dataset_path)
+    else:
+        write_json(iter_records(), dataset_path)
+
+
+if __name__ == "__main__":
+    main()
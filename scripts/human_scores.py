@@ -1,71 +1,140 @@
-from quality_control import aggregate_scores
+from quality_control import aggregate_all
+import argparse
 import json
+from urllib.parse import urlencode
 from urllib.request import urlopen
 
 
 file_path = "../data/prolific-responses.json"
 url_string = "https://cs4145-api-726011437905.europe-west4.run.app/questions"
 data_path = "../data/dataset.json"
+results_path = "../data/results.json"
+questions_snapshot_path = "../data/questions-snapshot.json"
 
+# Worker processes for quality control (None uses every core, 1 runs in-process)
+max_workers = None
 
-with urlopen(url_string) as url:
-    id_data = json.load(url)
-with open(file_path, "r", encoding="utf-8") as data_file:
-    human_data = json.load(data_file)
-with open(data_path, "r", encoding="utf-8") as og_file:
-    dataset = json.load(og_file)
-
-question_dict = {}
-for entry in human_data:
-    current_id = entry["question_id"]
-    current_faithfulness = 1.0 if entry["is_faithful"] else 0.0
-    current_relevancy = 1.0 if entry["is_relevant"] else 0.0
-
-    if current_id not in question_dict:
-        current_question_unit = list(filter(lambda q: q["id"] == current_id, id_data))
-        assert len(current_question_unit) == 1, "More than one matching ID!"
-        current_question = current_question_unit[0]
-
-        labeled_question_unit = list(
-            filter(
-                lambda q: q["query"] == current_question["query"]
-                and q["response"] == current_question["response"],
-                dataset,
-            )
-        )
-        assert len(labeled_question_unit) == 1, "More than 1 matching ID!"
-        labeled_question = labeled_question_unit[0]
-
-        question_dict[current_id] = {
-            "query": current_question["query"],
-            "response": current_question["response"],
-            "measured_faithfulness": labeled_question["faithfulness"],
-            "measured_relevancy": labeled_question["relevancy"],
-            "f_inputs": [(current_faithfulness, entry["faithfulness"])],
-            "r_inputs": [(current_relevancy, entry["relevance"])],
-        }
-    else:
-        question_dict[current_id]["f_inputs"].append(
-            (current_faithfulness, entry["faithfulness"])
-        )
-        question_dict[current_id]["r_inputs"].append(
-            (current_relevancy, entry["relevance"])
-        )
 
-for q_id in question_dict:
-    perceived_faithfulness, f_rationales, perceived_relevancy, r_rationales = (
-        aggregate_scores(
-            question_dict[q_id]["f_inputs"], question_dict[q_id]["r_inputs"]
-        )
+def fetch_all(url_string, **params):
+    # The API pages its list endpoints; follow X-Next-Cursor until exhausted
+    items, after = [], None
+    while True:
+        query = {"limit": 1000, **params, **({"after": after} if after else {})}
+        page_url = f"{url_string}?{urlencode(query)}"
+        with urlopen(page_url) as url:
+            items.extend(json.load(url))
+            after = url.headers.get("X-Next-Cursor")
+        if not after:
+            return items
+
+
+def index_unique(items, key):
+    # Maps key(item) -> item, remembering keys that occur more than once
+    index, duplicates = {}, set()
+    for item in items:
+        k = key(item)
+        if k in index:
+            duplicates.add(k)
+        index[k] = item
+    return index, duplicates
+
+
+def build_question_dict(human_data, id_data, dataset):
+    questions_by_id, duplicate_ids = index_unique(id_data, lambda q: q["id"])
+    labeled_by_pair, duplicate_pairs = index_unique(
+        dataset, lambda q: (q["query"], q["response"])
     )
-    question_dict[q_id].update(
+
+    question_dict = {}
+    for entry in human_data:
+        current_id = entry["question_id"]
+        current_faithfulness = 1.0 if entry["is_faithful"] else 0.0
+        current_relevancy = 1.0 if entry["is_relevant"] else 0.0
+
+        if current_id not in question_dict:
+            assert (
+                current_id in questions_by_id and current_id not in duplicate_ids
+            ), "More than one matching ID!"
+            current_question = questions_by_id[current_id]
+
+            pair = (current_question["query"], current_question["response"])
+            assert (
+                pair in labeled_by_pair and pair not in duplicate_pairs
+            ), "More than 1 matching ID!"
+            labeled_question = labeled_by_pair[pair]
+
+            question_dict[current_id] = {
+                "query": current_question["query"],
+                "response": current_question["response"],
+                "measured_faithfulness": labeled_question["faithfulness"],
+                "measured_relevancy": labeled_question["relevancy"],
+                "f_inputs": [(current_faithfulness, entry["faithfulness"])],
+                "r_inputs": [(current_relevancy, entry["relevance"])],
+            }
+        else:
+            question_dict[current_id]["f_inputs"].append(
+                (current_faithfulness, entry["faithfulness"])
+            )
+            question_dict[current_id]["r_inputs"].append(
+                (current_relevancy, entry["relevance"])
+            )
+    return question_dict
+
+
+def score_questions(question_dict, q_ids, max_workers=None):
+    # Runs quality control for the given questions and stores the outcome in place
+    aggregated = aggregate_all(
         {
-            "perceived_faithfulness": perceived_faithfulness,
-            "perceived_relevancy": perceived_relevancy,
-            "f_rationales": f_rationales,
-            "r_rationales": r_rationales,
-        }
+            q_id: (question_dict[q_id]["f_inputs"], question_dict[q_id]["r_inputs"])
+            for q_id in q_ids
+        },
+        max_workers=max_workers,
     )
+    for q_id, scores in aggregated.items():
+        perceived_faithfulness, f_rationales, perceived_relevancy, r_rationales = scores
+        question_dict[q_id].update(
+            {
+                "perceived_faithfulness": perceived_faithfulness,
+                "perceived_relevancy": perceived_relevancy,
+                "f_rationales": f_rationales,
+                "r_rationales": r_rationales,
+            }
+        )
+
+
+def load_questions(offline):
+    # Offline runs read the snapshot saved by the last online run
+    if offline:
+        with open(questions_snapshot_path, "r", encoding="utf-8") as snapshot:
+            return json.load(snapshot)
+    id_data = fetch_all(url_string)
+    with open(questions_snapshot_path, "w", encoding="utf-8") as snapshot:
+        json.dump(id_data, snapshot)
+    return id_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate the human scores.")
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=f"read questions from {questions_snapshot_path} instead of the API",
+    )
+    args = parser.parse_args()
+
+    id_data = load_questions(args.offline)
+    with open(file_path, "r", encoding="utf-8") as data_file:
+        human_data = json.load(data_file)
+    with open(data_path, "r", encoding="utf-8") as og_file:
+        dataset = json.load(og_file)
+
+    question_dict = build_question_dict(human_data, id_data, dataset)
+    score_questions(question_dict, question_dict.keys(), max_workers)
+
+    with open(results_path, "w", encoding="utf-8") as output_file:
+        json.dump(question_dict, output_file, indent=4)
+
 
-with open("../data/results.json", "w", encoding="utf-8") as output_file:
-    json.dump(question_dict, output_file, indent=4)
+# The guard keeps process-pool workers from re-running the script on import
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+from urllib.request import urlopen
+
+from dataset_store import DatasetStore, index_path_for, store_path
+from human_scores import (
+    build_question_dict,
+    data_path,
+    fetch_all,
+    results_path,
+    score_questions,
+)
+
+api_url = "https://cs4145-api-726011437905.europe-west4.run.app"
+state_path = "../data/results-state.json"
+
+# Below this many changed questions a process pool costs more than it saves
+POOL_THRESHOLD = 16
+
+# Response times are stamped by the app instance before the commit, so a row can
+# become visible below the watermark; every run re-reads this far back
+LOOKBACK_SECONDS = 300
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def write_json(path, data, **kwargs):
+    # Write to a temporary file first so a crash never leaves a truncated file
+    with open(f"{path}.tmp", "w", encoding="utf-8") as json_file:
+        json.dump(data, json_file, **kwargs)
+    os.replace(f"{path}.tmp", path)
+
+
+def fetch_new_responses(state, lookback):
+    # Re-reads the lookback window below the watermark and drops the responses
+    # that were already applied from it
+    if state["watermark"]:
+        since = datetime.fromisoformat(state["watermark"]) - lookback
+        responses = fetch_all(f"{api_url}/responses", since=since.isoformat())
+    else:
+        responses = fetch_all(f"{api_url}/responses")
+    return [r for r in responses if r["id"] not in state["applied_ids"]]
+
+
+def advance_watermark(state, responses, lookback):
+    """
+    Moves the watermark to the newest applied response.
+    :return: the new watermark, and the ids and times of the applied responses that
+    the next run's lookback window will fetch again
+    """
+    times = [datetime.fromisoformat(r["time"]) for r in responses]
+    if state["watermark"]:
+        times.append(datetime.fromisoformat(state["watermark"]))
+    watermark = max(times)
+    applied = {**state["applied_ids"], **{r["id"]: r["time"] for r in responses}}
+    window_start = watermark - lookback
+    return {
+        "watermark": watermark.isoformat(),
+        "applied_ids": {
+            id: time
+            for id, time in applied.items()
+            if datetime.fromisoformat(time) >= window_start
+        },
+    }
+
+
+def labeled(questions):
+    """
+    Reads the labeled dataset records of the given questions, matched on their query and response.
+    With the store of dataset_store.py only those records are parsed, otherwise the whole dataset.
+    """  # noqa: E501
+    if not index_path_for(store_path).exists():
+        with open(data_path, "r", encoding="utf-8") as og_file:
+            return json.load(og_file)
+    with DatasetStore() as store:
+        return [
+            record
+            for question in questions
+            for record in store.find(question["query"], question["response"])
+        ]
+
+
+def apply_responses(question_dict, responses):
+    """
+    Adds new responses to the per-question inputs, creating entries for questions seen for the first time.
+    :param question_dict: the persisted results, updated in place
+    :param responses: the responses newer than the watermark
+    :return: the ids of the questions whose inputs changed
+    """  # noqa: E501
+    fresh = [r for r in responses if r["question_id"] not in question_dict]
+    fresh_ids = {r["question_id"] for r in fresh}
+    if fresh:
+        id_data = []
+        for q_id in fresh_ids:
+            with urlopen(f"{api_url}/questions/{q_id}") as url:
+                id_data.append(json.load(url))
+        question_dict.update(build_question_dict(fresh, id_data, labeled(id_data)))
+
+    for entry in responses:
+        if entry["question_id"] in fresh_ids:
+            continue
+        question = question_dict[entry["question_id"]]
+        question["f_inputs"].append(
+            (1.0 if entry["is_faithful"] else 0.0, entry["faithfulness"])
+        )
+        question["r_inputs"].append(
+            (1.0 if entry["is_relevant"] else 0.0, entry["relevance"])
+        )
+    return {r["question_id"] for r in responses}
+
+
+def export_is_stale():
+    # True if a crash hit between the state write and the results.json export
+    return os.path.exists(state_path) and (
+        not os.path.exists(results_path)
+        or os.path.getmtime(results_path) < os.path.getmtime(state_path)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fold responses newer than the last run into the results."
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="ignore the stored watermark and recompute from every response",
+    )
+    parser.add_argument(
+        "--lookback",
+        type=float,
+        default=LOOKBACK_SECONDS,
+        help="seconds below the watermark that are fetched again, to catch"
+        f" responses committed late (default {LOOKBACK_SECONDS})",
+    )
+    args = parser.parse_args()
+    lookback = timedelta(seconds=args.lookback)
+
+    # The watermark is stored together with the results it covers, so a single
+    # atomic write keeps them consistent; results.json is an export of the latter
+    state = load_json(state_path, None)
+    if args.rebuild or state is None or "applied_ids" not in state:
+        state = {"watermark": None, "applied_ids": {}, "results": {}}
+    question_dict = state["results"]
+
+    responses = fetch_new_responses(state, lookback)
+    if not responses:
+        print(f"No responses since {state['watermark']}")
+        if export_is_stale():
+            write_json(results_path, question_dict, indent=4)
+        return
+
+    changed = apply_responses(question_dict, responses)
+    score_questions(
+        question_dict,
+        sorted(changed),
+        max_workers=None if len(changed) >= POOL_THRESHOLD else 1,
+    )
+    write_json(
+        state_path,
+        {**advance_watermark(state, responses, lookback), "results": question_dict},
+    )
+    write_json(results_path, question_dict, indent=4)
+    print(
+        f"Applied {len(responses)} responses to {len(changed)} questions "
+        f"({len(question_dict)} total)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://cs4145-api-726011437905.europe-west4.run.app"
+BATCH_SIZE = 100
+MAX_WORKERS = 4
 
 
 def load_dataset():
@@ -10,9 +16,9 @@ def load_dataset():
         return json.load(f)
 
 
-def post_question(question):
+def to_payload(question):
     # Transform the dataset format to match the API requirements
-    data = {
+    return {
         "query": question["query"],
         "context1": (
             question["context_snippets"][0]
@@ -27,23 +33,48 @@ def post_question(question):
         "response": question["response"],
     }
 
-    # Send POST request to the API
-    response = requests.post(
-        "https://cs4145-api-726011437905.europe-west4.run.app/questions", json=data
+
+def make_session():
+    # Reuse keep-alive connections across batches instead of one per question
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def post_batch(session, batch):
+    # Send the batch as NDJSON to the bulk endpoint
+    body = "\n".join(json.dumps(to_payload(question)) for question in batch)
+    response = session.post(
+        f"{API_URL}/questions/bulk",
+        data=body.encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"},
     )
 
-    if response.status_code == 201:
-        print(f"Successfully posted question {question['id']}")
-    else:
-        print(f"Failed to post question {question['id']}: {response.status_code}")
+    if response.status_code not in (201, 207):
+        print(
+            f"Failed to post questions {batch[0]['id']}..{batch[-1]['id']}: "
+            f"{response.status_code}"
+        )
+        return 0
+
+    summary = response.json()
+    for result in summary["results"]:
+        if result["status"] != 201:
+            question = batch[result["index"]]
+            print(f"Failed to post question {question['id']}: {result['error']}")
+    return summary["created"]
 
 
 def main():
     dataset = load_dataset()
     print(f"Loaded {len(dataset)} questions from dataset")
 
-    for question in dataset:
-        post_question(question)
+    batches = [dataset[i : i + BATCH_SIZE] for i in range(0, len(dataset), BATCH_SIZE)]
+    with make_session() as session, ThreadPoolExecutor(MAX_WORKERS) as executor:
+        created = sum(executor.map(lambda batch: post_batch(session, batch), batches))
+    print(f"Successfully posted {created} of {len(dataset)} questions")
 
 
 if __name__ == "__main__":
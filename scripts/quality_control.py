@@ -1,15 +1,16 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from difflib import SequenceMatcher
+from functools import lru_cache
 from itertools import combinations
-from typing import List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
 
-def _compute_ratcliff_obershelp(rationale_1: str, rationale_2: str) -> float:
-    """
-    Computes the Ratcliff-Obershelp similarity between a pair of rationales.
-    :param rationale_1: first rationale in the pair
-    :param rationale_2: second rationale in the pair
-    :return: the maximum of the two similarity-scores (as RO is not commutative)
-    """  # noqa: E501
+
+@lru_cache(maxsize=65536)
+def _cached_ratcliff_obershelp(rationale_1: str, rationale_2: str) -> float:
     res_12: float = SequenceMatcher(
         lambda x: x in " \t\n", rationale_1, rationale_2, autojunk=False
     ).ratio()
@@ -19,43 +20,93 @@ def _compute_ratcliff_obershelp(rationale_1: str, rationale_2: str) -> float:
     return max(res_12, res_21)
 
 
-def _select_threshold(rationale_combinations: List[Tuple[str, str]]) -> float:
+def _compute_ratcliff_obershelp(rationale_1: str, rationale_2: str) -> float:
+    """
+    Computes the Ratcliff-Obershelp similarity between a pair of rationales.
+    :param rationale_1: first rationale in the pair
+    :param rationale_2: second rationale in the pair
+    :return: the maximum of the two similarity-scores (as RO is not commutative)
+    """  # noqa: E501
+    # The score is symmetric, so order the pair to share one cache entry
+    if rationale_2 < rationale_1:
+        rationale_1, rationale_2 = rationale_2, rationale_1
+    return _cached_ratcliff_obershelp(rationale_1, rationale_2)
+
+
+def _similarity_upper_bounds(rationales: List[str]) -> np.ndarray:
+    """
+    Bounds the Ratcliff-Obershelp similarity of every pair of rationales from above, using character (1-gram) counts.
+    :param rationales: the rationales to compare
+    :return: a symmetric matrix whose entry (i, j) is at least the similarity of rationales i and j
+    """  # noqa: E501
+    alphabet = {char: idx for idx, char in enumerate(set("".join(rationales)))}
+    counts = np.zeros((len(rationales), max(len(alphabet), 1)), dtype=np.int64)
+    for row, rationale in enumerate(rationales):
+        for char in rationale:
+            counts[row, alphabet[char]] += 1
+
+    # Matching blocks can never share more characters than the two multisets do
+    overlap = np.minimum(counts[:, None, :], counts[None, :, :]).sum(axis=2)
+    lengths = counts.sum(axis=1)
+    totals = lengths[:, None] + lengths[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, 2.0 * overlap / totals, 1.0)
+
+
+def _score_pairs(rationales: List[str]) -> Dict[Tuple[int, int], float]:
+    """
+    Scores the pairs of rationales that could reach the maximum pairwise similarity, skipping the others.
+    :param rationales: the rationales to compare
+    :return: the similarity of every scored (i, j) index pair, which includes all pairs at the maximum
+    """  # noqa: E501
+    bounds = _similarity_upper_bounds(rationales)
+    pairs = sorted(
+        combinations(range(len(rationales)), 2), key=lambda pair: -bounds[pair]
+    )
+
+    scores: Dict[Tuple[int, int], float] = {}
+    best = 0.0
+    for idx_1, idx_2 in pairs:
+        # Pairs come in decreasing bound order, so none of the rest can reach best
+        if bounds[idx_1, idx_2] + 1e-12 < best:
+            break
+        score = _compute_ratcliff_obershelp(rationales[idx_1], rationales[idx_2])
+        scores[(idx_1, idx_2)] = score
+        best = max(best, score)
+    return scores
+
+
+def _select_threshold(scores: Dict[Tuple[int, int], float]) -> float:
     """
     Computes the threshold to be used during threshold-filtering for the given data instance (AR1 paper).
-    :param rationale_combinations: pairwise combinations of rationales
+    :param scores: similarity-scores of the pairwise combinations of rationales
     :return: the dynamically-computed threshold
     """  # noqa: E501
-    threshold = 0.0
-    for tup in rationale_combinations:
-        threshold = max(threshold, _compute_ratcliff_obershelp(tup[0], tup[1]))
-    return threshold
+    return max(scores.values(), default=0.0)
 
 
 def _filter_by_threshold(
-    metric_inputs: List[Tuple[float, str]]
+    metric_inputs: List[Tuple[float, str]],
 ) -> Tuple[List[float], List[str]]:
     """
     Filters the workers' input for a given metric and data instance based on rationale-overlap (AR1 paper).
     :param metric_inputs: the scores and rationales provided by the workers for the given metric and data instance
     :return: the scores and rationales for which rationale-overlap was on or above the threshold
     """  # noqa: E501
-    included_indices: Set[int] = set()
+    rationales: List[str] = [tup[1] for tup in metric_inputs]
+    scores = _score_pairs(rationales)
+    selected_threshold: float = _select_threshold(scores)
 
-    rationale_combinations: List[Tuple[str, str]] = list(
-        combinations(map(lambda tup: tup[1], metric_inputs), 2)
-    )
-    selected_threshold: float = _select_threshold(rationale_combinations)
-
-    for rationale_1, rationale_2 in rationale_combinations:
-        if _compute_ratcliff_obershelp(rationale_1, rationale_2) >= selected_threshold:
-            idx_1: int = metric_inputs.index(
-                list(filter(lambda tup: tup[1] == rationale_1, metric_inputs))[0]
-            )
-            idx_2: int = metric_inputs.index(
-                list(filter(lambda tup: tup[1] == rationale_2, metric_inputs))[0]
-            )
-            included_indices.add(idx_1)
-            included_indices.add(idx_2)
+    # Identical rationales are attributed to their first occurrence
+    first_indices: Dict[str, int] = {}
+    for idx, rationale in enumerate(rationales):
+        first_indices.setdefault(rationale, idx)
+
+    included_indices: Set[int] = set()
+    for (idx_1, idx_2), score in scores.items():
+        if score >= selected_threshold:
+            included_indices.add(first_indices[rationales[idx_1]])
+            included_indices.add(first_indices[rationales[idx_2]])
 
     return [
         metric_inputs[idx][0]
@@ -102,3 +153,45 @@ def aggregate_scores(
         majority_relevancy_score,
         relevancy_rationales,
     )
+
+
+def _aggregate_item(
+    item: Tuple[List[Tuple[float, str]], List[Tuple[float, str]]],
+) -> Tuple[float, List[str], float, List[str]]:
+    return aggregate_scores(item[0], item[1])
+
+
+def aggregate_all(
+    question_inputs: Dict[str, Tuple[List[Tuple[float, str]], List[Tuple[float, str]]]],
+    max_workers: Optional[int] = None,
+    chunksize: int = 8,
+) -> Dict[str, Tuple[float, List[str], float, List[str]]]:
+    """
+    Computes the aggregated performance-metrics for many data instances across a process pool.
+    :param question_inputs: (faithfulness_inputs, relevancy_inputs) per question-id
+    :param max_workers: number of worker processes (defaults to the number of cores); 1 runs in-process
+    :param chunksize: number of questions sent to a worker at a time
+    :return: the output of aggregate_scores per question-id, in the order of question_inputs
+    """  # noqa: E501
+    question_ids = list(question_inputs)
+    items = [question_inputs[q_id] for q_id in question_ids]
+    results: Dict[str, Tuple[float, List[str], float, List[str]]] = {}
+    start = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers) if max_workers != 1 else nullcontext()
+    with pool as executor:
+        # map() yields in submission order, so the results are deterministic
+        outputs: Iterable = (
+            executor.map(_aggregate_item, items, chunksize=chunksize)
+            if executor is not None
+            else map(_aggregate_item, items)
+        )
+        for done, (q_id, output) in enumerate(zip(question_ids, outputs), start=1):
+            results[q_id] = output
+            if done % chunksize == 0 or done == len(items):
+                print(
+                    f"Aggregated {done}/{len(items)} questions "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+
+    return results
@@ -1,7 +1,8 @@
 import json
-from datetime import datetime
+
 import matplotlib.pyplot as plt
 import numpy as np
+from analytics import duration_buckets, load_responses, worker_durations
 
 file_path = "data\prolific-responses.json"
 
@@ -18,26 +19,8 @@ correct_answer = {
 }
 
 def calculate_time_differences(data):
-    worker_times = {}
-
-    for entry in data:
-        worker_id = entry["worker_id"]
-        time_value = datetime.fromisoformat(entry["time"])
-        
-        if worker_id not in worker_times:
-            worker_times[worker_id] = []
-
-        worker_times[worker_id].append(time_value)
-
-    time_differences = {}
-
-    for worker_id, times in worker_times.items():
-        min_time = min(times)
-        max_time = max(times)
-        diff_minutes = (max_time - min_time).total_seconds() / 60
-        time_differences[worker_id] = diff_minutes
-
-    return time_differences
+    worker_ids, minutes = worker_durations(load_responses(data))
+    return dict(zip(worker_ids.tolist(), minutes.tolist()))
 
 
 def check_correctness(data, correct_answer):
@@ -91,22 +74,7 @@ def create_time_range_table(time_differences):
     times = np.array(list(time_differences.values()))
     mean_time = np.mean(times)
     std_dev_time = np.std(times)
-    ranges = {
-        "0-10 minutes": 0,
-        "10-20 minutes": 0,
-        "20-30 minutes": 0,
-        ">30 minutes": 0,
-    }
-
-    for time in time_differences.values():
-        if 0 <= time <= 10:
-            ranges["0-10 minutes"] += 1
-        elif 10 < time <= 20:
-            ranges["10-20 minutes"] += 1
-        elif 20 < time <= 30:
-            ranges["20-30 minutes"] += 1
-        elif time > 30: 
-            ranges[">30 minutes"] += 1
+    ranges = duration_buckets(times)
 
     print("Time Ranges Summary:")
     for range_label, count in ranges.items():
@@ -0,0 +1,175 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from flask import Flask, Response, g, jsonify, request
+from werkzeug.http import HTTP_STATUS_CODES
+
+from cache import LRUCache
+
+
+class Limits(NamedTuple):
+    concurrency: int = 0  # requests in flight at once; 0 disables the check
+    rate: float = 0.0  # requests per second for the whole route; 0 disables it
+    burst: int = 0
+    worker_rate: float = 0.0  # requests per second per worker_id; 0 disables it
+    worker_burst: int = 0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """
+        Takes a token if one is available.
+        :return: 0 if a token was taken, otherwise the seconds until one will be
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class RouteLimiter:
+    """
+    Admission control for one route: a per-worker and a route-wide token bucket,
+    followed by a cap on requests in flight. Rejections are fast, so a burst is
+    answered with 429/503 instead of queueing for the database pool.
+    """
+
+    def __init__(self, limits: Limits, max_workers: int = 10000) -> None:
+        self.limits = limits
+        self._slots = (
+            threading.BoundedSemaphore(limits.concurrency)
+            if limits.concurrency
+            else None
+        )
+        self._bucket = TokenBucket(limits.rate, limits.burst) if limits.rate else None
+        self._workers = LRUCache(maxsize=max_workers)
+        self._lock = threading.Lock()
+
+    def _worker_bucket(self, worker_id: str) -> TokenBucket:
+        with self._lock:
+            if (bucket := self._workers.get(worker_id)) is None:
+                bucket = TokenBucket(self.limits.worker_rate, self.limits.worker_burst)
+                self._workers.set(worker_id, bucket)
+            return bucket
+
+    def admit(
+        self, worker_id: Optional[str] = None, wait: float = 0.0
+    ) -> Optional[Tuple[int, float]]:
+        """
+        Decides whether a request may proceed; admitted requests must call release().
+        :param worker_id: the worker making the request, if known
+        :param wait: seconds to wait for a free slot before rejecting
+        :return: None if admitted, otherwise the status code and Retry-After seconds
+        """  # noqa: E501
+        if worker_id and self.limits.worker_rate:
+            if delay := self._worker_bucket(worker_id).take():
+                return 429, delay
+        if self._bucket and (delay := self._bucket.take()):
+            return 429, delay
+        if self._slots:
+            admitted = (
+                self._slots.acquire(timeout=wait)
+                if wait > 0
+                else self._slots.acquire(blocking=False)
+            )
+            if not admitted:
+                return 503, 1.0
+        return None
+
+    def release(self) -> None:
+        if self._slots:
+            self._slots.release()
+
+
+# Limiters by endpoint name, shared by the Flask and async routes of a process
+limiters: Dict[str, RouteLimiter] = {}
+
+
+def default_limits() -> Dict[str, Limits]:
+    # Beyond the pool size requests would only wait for a connection
+    pool = int(os.getenv("DB_POOL_SIZE", 5)) + int(os.getenv("DB_MAX_OVERFLOW", 2))
+    return {
+        "api.create_response": Limits(
+            concurrency=pool, worker_rate=1.0, worker_burst=10
+        ),
+        "api.create_responses_batch": Limits(concurrency=2),
+        "api.create_questions_bulk": Limits(concurrency=1),
+        "api.increment_counter": Limits(concurrency=pool),
+        "api.assign_question": Limits(worker_rate=2.0, worker_burst=20),
+    }
+
+
+def load_limits() -> Dict[str, Limits]:
+    """
+    Builds the limits of every route from default_limits() and the ADMISSION_LIMITS
+    variable, a JSON object such as {"api.create_response": {"rate": 200, "burst":
+    400}} whose fields override the defaults of each endpoint.
+    """
+    limits = default_limits()
+    for endpoint, overrides in json.loads(os.getenv("ADMISSION_LIMITS", "{}")).items():
+        limits[endpoint] = limits.get(endpoint, Limits())._replace(**overrides)
+    return limits
+
+
+def retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def _worker_id() -> Optional[str]:
+    if worker_id := request.args.get("worker_id"):
+        return worker_id
+    if request.is_json and isinstance(data := request.get_json(silent=True), dict):
+        if isinstance(worker_id := data.get("worker_id"), str):
+            return worker_id
+    return None
+
+
+def _rejection(status: int, seconds: float) -> Any:
+    error = HTTP_STATUS_CODES[status]
+    return jsonify(error=error), status, {"Retry-After": retry_after(seconds)}
+
+
+def _teardown_request(exc: Optional[BaseException]) -> None:
+    if (limiter := g.pop("admitted_limiter", None)) is not None:
+        limiter.release()
+
+
+def init_admission(app: Flask) -> None:
+    """
+    Applies the configured per-route limits to every request of the app. A request
+    over a concurrency limit waits up to ADMISSION_WAIT seconds for a slot.
+    """
+    wait = float(os.getenv("ADMISSION_WAIT", 0.05))
+    limiters.clear()
+    for endpoint, limits in load_limits().items():
+        limiters[endpoint] = RouteLimiter(limits)
+
+    @app.before_request
+    def admit() -> Optional[Response]:
+        if (limiter := limiters.get(request.endpoint)) is None:
+            return None
+        # Only routes with per-worker limits need the worker id from the body
+        worker_id = _worker_id() if limiter.limits.worker_rate else None
+        if rejected := limiter.admit(worker_id, wait):
+            return _rejection(*rejected)
+        g.admitted_limiter = limiter
+        return None
+
+    app.teardown_request(_teardown_request)
@@ -1,66 +1,152 @@
-import logging
 import os
-from logging.handlers import RotatingFileHandler
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
 from urllib.parse import quote_plus
 
-from dotenv import load_dotenv
 from flask import Flask, jsonify
 from flask_cors import CORS
 
+from admission import init_admission
+from cache import page_cache, question_cache
+from logging_config import configure_logging
+from metrics import init_metrics
 from models import db
-from routes import api
-
-
-def create_app() -> Flask:
-    load_dotenv()
-
-    app = Flask(__name__)
-    CORS(app)
-
-    # Configure logging
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
-
-    file_handler = RotatingFileHandler("logs/app.log", maxBytes=10240, backupCount=10)
-    file_handler.setFormatter(
-        logging.Formatter(
-            "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
+from response_compression import init_compression
+from routes import MAX_BODY_BYTES, api
+from scheduler import scheduler
+from serialization import FastJSONProvider
+from stats import stats
+
+
+def database_uri() -> str:
+    required = ["DB_USER", "DB_PASSWORD", "DB_NAME"]
+    if not os.getenv("DB_SOCKET_PATH"):
+        required += ["DB_HOST", "DB_PORT"]
+    missing = [name for name in required if os.getenv(name) is None]
+    if missing:
+        # FAST_START skips .env, so its settings must come from the environment
+        raise RuntimeError(
+            f"Set DATABASE_URL, or the database variables {', '.join(missing)}"
         )
-    )
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-
-    # Also log to stdout
-    stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(logging.INFO)
-    app.logger.addHandler(stream_handler)
-
-    app.logger.setLevel(logging.INFO)
-    app.logger.info("Application startup")
 
-    # Database configuration
     db_user = quote_plus(os.getenv("DB_USER"))
     db_pass = quote_plus(os.getenv("DB_PASSWORD"))
     db_name = os.getenv("DB_NAME")
 
     socket_path = os.getenv("DB_SOCKET_PATH")
     if socket_path:
-        app.config["SQLALCHEMY_DATABASE_URI"] = (
-            f"postgresql://{db_user}:{db_pass}@/{db_name}" f"?host={socket_path}"
-        )
+        return f"postgresql://{db_user}:{db_pass}@/{db_name}" f"?host={socket_path}"
     else:
         db_host = os.getenv("DB_HOST")
         db_port = os.getenv("DB_PORT")
+        return f"postgresql://{db_user}:{db_pass}" f"@{db_host}:{db_port}/{db_name}"
+
+
+class StartupTimer:
+    """
+    Records how long each phase of create_app() takes, to be logged as one line.
+    """
+
+    def __init__(self, started: Optional[float] = None) -> None:
+        # Every phase is wall-clock time from perf_counter
+        now = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        if started is None:
+            self.started = now
+        else:
+            self.started = started
+            self.phases.append(("imports", now - started))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def summary(self) -> str:
+        phases = [*self.phases, ("total", time.perf_counter() - self.started)]
+        return ", ".join(f"{name}={seconds * 1000:.1f}" for name, seconds in phases)
+
+
+def create_app(
+    fast_start: Optional[bool] = None, started: Optional[float] = None
+) -> Flask:
+    """
+    Builds the application.
+    :param fast_start: skip the .env file and the schema upgrade, so nothing connects
+    to the database until the first request; the schema must then be upgraded by
+    running migrations.py. Defaults to the FAST_START variable.
+    :param started: time.perf_counter() before the application modules were
+    imported, to include the imports in the startup timing
+    """
+    timer = StartupTimer(started)
+    if fast_start is None:
+        fast_start = os.getenv("FAST_START", "false").lower() == "true"
+
+    if not fast_start:
+        with timer.phase("dotenv"):
+            from dotenv import load_dotenv
+
+            load_dotenv()
+
+    with timer.phase("flask"):
+        app = Flask(__name__)
+        app.json = FastJSONProvider(app)
+        CORS(app)
+
+    # Configure logging
+    with timer.phase("logging"):
+        log_file = os.getenv("LOG_FILE", "false" if fast_start else "true")
+        configure_logging(app, log_file=log_file.lower() == "true")
+    app.logger.info("Application startup")
+
+    with timer.phase("config"):
+        # Database configuration
         app.config["SQLALCHEMY_DATABASE_URI"] = (
-            f"postgresql://{db_user}:{db_pass}" f"@{db_host}:{db_port}/{db_name}"
+            os.getenv("DATABASE_URL") or database_uri()
         )
 
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-    db.init_app(app)
-    with app.app_context():
-        db.create_all()
-    app.register_blueprint(api)
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        # Werkzeug answers 413 to larger bodies before they are read
+        app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES
+
+        # Every worker process holds up to pool_size + max_overflow connections, so
+        # keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the connection limit
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 2)),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        }
+
+        app.config["COUNTER_SHARDS"] = int(os.getenv("COUNTER_SHARDS", 1))
+        scheduler.refresh_seconds = float(os.getenv("SCHEDULER_REFRESH_SECONDS", 60))
+        scheduler.pending_ttl = float(os.getenv("SCHEDULER_PENDING_TTL", 600))
+        for cache in (question_cache, page_cache):
+            cache.ttl = float(os.getenv("QUESTION_CACHE_TTL", 60))
+        question_cache.maxsize = int(os.getenv("QUESTION_CACHE_SIZE", 1024))
+        page_cache.maxbytes = int(os.getenv("PAGE_CACHE_BYTES", 16 * 1024 * 1024))
+
+    # Creates the engine, whose pool connects on first use
+    with timer.phase("database"):
+        db.init_app(app)
+
+    if not fast_start:
+        with timer.phase("schema"), app.app_context():
+            from migrations import upgrade
+
+            upgrade()
+
+    with timer.phase("routes"):
+        app.register_blueprint(api)
+        app.register_blueprint(stats)
+        init_metrics(app)
+        init_admission(app)
+        init_compression(app)
 
     @app.errorhandler(400)
     def bad_request(e):
@@ -70,6 +156,7 @@ def create_app() -> Flask:
     def not_found(e):
         return jsonify(error="Not Found"), 404
 
+    app.logger.info("Startup phases (ms): %s", timer.summary())
     return app
 
 
@@ -0,0 +1,284 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound
+from werkzeug.http import HTTP_STATUS_CODES, parse_etags
+
+from admission import limiters, retry_after
+from cache import context_cache, question_cache
+from metrics import finish_request, start_request
+from models import ClassificationQuestion, Context, UserResponse, db
+from routes import (
+    IMMUTABLE_CACHE_CONTROL,
+    RESPONSE_COLUMNS,
+    RESPONSE_FIELDS,
+    validate_item,
+)
+from scheduler import answer_query, scheduler
+from serialization import (
+    CachedBody,
+    dumps,
+    question_fields,
+    records,
+    select_questions,
+    serialize_body,
+)
+
+# Same logger, and so the same handlers, as the Flask app
+logger = logging.getLogger("app")
+
+# Bound to the async engine by create_asgi_app()
+sessions = async_sessionmaker(expire_on_commit=False)
+
+
+def _json(
+    payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    return Response(
+        dumps(payload), status_code, headers=headers, media_type="application/json"
+    )
+
+
+def _admit(endpoint: str, worker_id: Any) -> Optional[Response]:
+    # Same limiters as the Flask routes, but a full route is rejected without
+    # waiting, which would block the event loop. Admitted requests must _release().
+    if not (limiter := limiters.get(endpoint)):
+        return None
+    if rejected := limiter.admit(worker_id if isinstance(worker_id, str) else None):
+        status, seconds = rejected
+        return _json(
+            {"error": HTTP_STATUS_CODES[status]},
+            status,
+            {"Retry-After": retry_after(seconds)},
+        )
+    return None
+
+
+def _release(endpoint: str) -> None:
+    if limiter := limiters.get(endpoint):
+        limiter.release()
+
+
+def _args(request: Request) -> MultiDict:
+    # The shared parsers read query parameters through the werkzeug interface
+    return MultiDict(request.query_params.multi_items())
+
+
+def _send_cached(
+    request: Request, entry: CachedBody, cache_control: Optional[str] = None
+) -> Response:
+    headers = {"ETag": f'"{entry.etag}"'}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if_none_match = parse_etags(request.headers.get("if-none-match"))
+    if if_none_match.contains_weak(entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+async def _question_record(
+    session: AsyncSession, id: str, fields: List[str]
+) -> Optional[Dict[str, Any]]:
+    query = select_questions(fields).where(ClassificationQuestion.id == id)
+    if (row := (await session.execute(query)).first()) is None:
+        return None
+    return records(fields, [row])[0]
+
+
+async def _question_entry(
+    session: AsyncSession, id: str, fields: Optional[List[str]] = None
+) -> Optional[CachedBody]:
+    # Shares question_cache with the Flask routes, whose writes invalidate it
+    if fields is not None:
+        record = await _question_record(session, id, fields)
+        return serialize_body(record) if record else None
+    if (entry := question_cache.get(id)) is None:
+        fields = list(ClassificationQuestion.FIELDS)
+        if not (record := await _question_record(session, id, fields)):
+            return None
+        entry = serialize_body(record)
+        question_cache.set(id, entry)
+    return entry
+
+
+async def healthz(request: Request) -> Response:
+    return _json({"status": "ok"})
+
+
+async def readyz(request: Request) -> Response:
+    try:
+        async with sessions() as session:
+            await session.execute(db.text("SELECT 1"))
+    except SQLAlchemyError:
+        logger.warning("Readiness check failed", exc_info=True)
+        return _json({"status": "unavailable"}, 503)
+    return _json({"status": "ok"})
+
+
+async def get_question(request: Request) -> Response:
+    id = request.path_params["id"]
+    logger.info("Fetching question with id: %s", id)
+    fields = question_fields(_args(request))
+    async with sessions() as session:
+        entry = await _question_entry(session, id, fields)
+    if entry:
+        logger.info("Found question %s", id)
+        return _send_cached(request, entry)
+    logger.warning("Question %s not found", id)
+    raise NotFound()
+
+
+async def get_random_question(request: Request) -> Response:
+    logger.info("Fetching random question")
+    fields = question_fields(_args(request)) or list(ClassificationQuestion.FIELDS)
+    query = select_questions(fields).order_by(func.random()).limit(1)
+    async with sessions() as session:
+        row = (await session.execute(query)).first()
+    if row:
+        logger.info("Retrieved random question %s", row.id)
+        return _json(records(fields, [row])[0])
+    logger.warning("No questions available for random selection")
+    raise NotFound()
+
+
+async def assign_question(request: Request) -> Response:
+    args = _args(request)
+    if not (worker_id := args.get("worker_id")):
+        logger.warning("Question assignment requested without worker_id")
+        raise BadRequest()
+
+    fields = question_fields(args)
+    if rejection := _admit("api.assign_question", worker_id):
+        return rejection
+    try:
+        async with sessions() as session:
+            await scheduler.ensure_loaded_async(session)
+            while question_id := scheduler.assign(worker_id):
+                # As in the Flask route, skip what other processes have changed
+                answer = await session.execute(answer_query(worker_id, question_id))
+                if answer.first():
+                    scheduler.record_response(worker_id, question_id)
+                elif entry := await _question_entry(session, question_id, fields):
+                    logger.info("Assigned question %s to %s", question_id, worker_id)
+                    return _send_cached(request, entry)
+                else:
+                    scheduler.remove_question(question_id)
+    finally:
+        _release("api.assign_question")
+    logger.warning("No unanswered questions left for worker %s", worker_id)
+    raise NotFound()
+
+
+async def get_context(request: Request) -> Response:
+    hash = request.path_params["hash"]
+    if (entry := context_cache.get(hash)) is None:
+        async with sessions() as session:
+            context = await session.get(Context, hash)
+        if not context:
+            logger.warning("Context %s not found", hash)
+            raise NotFound()
+        entry = CachedBody(dumps(context.to_dict()), hash)
+        context_cache.set(hash, entry)
+    return _send_cached(request, entry, IMMUTABLE_CACHE_CONTROL)
+
+
+async def create_response(request: Request) -> Response:
+    if request.headers.get("content-type", "").split(";")[0] != "application/json":
+        logger.warning("Received non-JSON request for response creation")
+        raise BadRequest()
+    try:
+        data = await request.json()
+    except ValueError:
+        raise BadRequest()
+    if not isinstance(data, dict) or not all(f in data for f in RESPONSE_FIELDS):
+        logger.warning("Missing required fields in response creation")
+        raise BadRequest()
+
+    response_data = {k: data[k] for k in RESPONSE_FIELDS}
+    if "comments" in data:
+        response_data["comments"] = data["comments"]
+    # The same checks as the Flask routes, before any value reaches the driver
+    if error := validate_item(response_data, RESPONSE_FIELDS, RESPONSE_COLUMNS):
+        logger.warning("Invalid response: %s", error)
+        raise BadRequest(description=error)
+
+    if rejection := _admit("api.create_response", data["worker_id"]):
+        return rejection
+    try:
+        return await _create_response(data, response_data)
+    finally:
+        _release("api.create_response")
+
+
+async def _create_response(
+    data: Dict[str, Any], response_data: Dict[str, Any]
+) -> Response:
+    async with sessions() as session:
+        exists = await session.scalar(
+            db.select(ClassificationQuestion.id).where(
+                ClassificationQuestion.id == data["question_id"]
+            )
+        )
+        if not exists:
+            logger.warning(
+                "Question %s not found for response creation", data["question_id"]
+            )
+            raise NotFound(description="Question not found")
+        response = UserResponse(**response_data)
+        session.add(response)
+        await session.commit()
+        # Reload the stored row, as the Flask route does, so time reads back the same
+        await session.refresh(response)
+
+    scheduler.record_response(response.worker_id, response.question_id)
+    logger.info(
+        "Created new response for question %s by worker %s",
+        data["question_id"],
+        data["worker_id"],
+    )
+    return _json(response.to_dict(), 201)
+
+
+async def http_error(request: Request, exc: HTTPException) -> Response:
+    # Errors raised here and by the shared parsers use the werkzeug exceptions
+    return _json({"error": exc.name}, exc.code or 500)
+
+
+def _instrumented(rule: str, endpoint: Callable[[Request], Awaitable[Response]]):
+    # Records the route in /metrics under the same label as its Flask counterpart
+    async def handle(request: Request) -> Response:
+        start_request()
+        status = 500
+        try:
+            response = await endpoint(request)
+            status = response.status_code
+            return response
+        except HTTPException as e:
+            status = e.code or 500
+            raise
+        finally:
+            finish_request(rule, request.method, status)
+
+    return handle
+
+
+# The crowd-worker hot path; every other route is served by the Flask app
+routes = [
+    Route(path, _instrumented(rule, endpoint), methods=[method])
+    for path, rule, endpoint, method in (
+        ("/healthz", "/healthz", healthz, "GET"),
+        ("/readyz", "/readyz", readyz, "GET"),
+        ("/questions/random", "/questions/random", get_random_question, "GET"),
+        ("/questions/assign", "/questions/assign", assign_question, "GET"),
+        ("/questions/{id}", "/questions/<string:id>", get_question, "GET"),
+        ("/contexts/{hash}", "/contexts/<string:hash>", get_context, "GET"),
+        ("/responses", "/responses", create_response, "POST"),
+    )
+]
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe mapping that evicts the least recently used entry.
+
+    Entries older than `ttl` seconds are treated as missing, which bounds how long a
+    process can serve data that another process has since changed. With `maxbytes`,
+    the sizes passed to set() are also bounded in total, for values such as response
+    bodies whose size the client controls.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if (entry := self._data.get(key)) is None:
+                return None
+            stored_at, value, _ = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """
+        Stores value under key, evicting the least recently used entries as needed.
+        :param size: the size of value in bytes, counted against maxbytes
+        """
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return  # would evict everything else and still not fit
+            self._data[key] = (time.monotonic(), value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self._bytes > self.maxbytes
+            ):
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# Serialized question bodies keyed by id, and list pages keyed by (limit, after,
+# fields); a page can run to megabytes at a large limit, so pages are also
+# bounded by their total size
+question_cache = LRUCache(maxsize=1024, ttl=60.0)
+page_cache = LRUCache(maxsize=128, ttl=60.0, maxbytes=16 * 1024 * 1024)
+# Contexts never change once stored, so their bodies need no expiry
+context_cache = LRUCache(maxsize=1024)
@@ -0,0 +1,28 @@
+import os
+
+# Production server settings, e.g. `gunicorn -c src/gunicorn.conf.py wsgi:app`
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+# A fixed default rather than one derived from the host's CPUs, which containers
+# under a CPU quota over-report: every worker holds its own DB_POOL_SIZE +
+# DB_MAX_OVERFLOW connections, so instances * workers * (size + overflow) must stay
+# below the Postgres connection limit however far the service scales out
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Each worker builds its own app so background threads (logging) and per-process
+# caches are created after the fork; the caches, the assignment scheduler and the
+# admission limits therefore exist once per worker
+preload_app = False
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = None
+errorlog = "-"
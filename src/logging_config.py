@@ -0,0 +1,76 @@
+import atexit
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List
+
+from flask import Flask
+from flask.logging import default_handler
+
+LOG_FORMAT = "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a random fraction of the records at each configured level.
+    Levels without a rate are always kept.
+    """
+
+    def __init__(self, rates: Dict[int, float]) -> None:
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records unformatted, so the %-interpolation of the message happens on
+    the listener thread instead of the request thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(app: Flask, log_file: bool = True) -> QueueListener:
+    """
+    Routes the app logger through an in-memory queue drained by a background thread
+    that writes to stdout and, unless disabled, to a rotating file.
+    :param app: the application whose logger is configured
+    :param log_file: also write to logs/app.log
+    :return: the started listener, stopped automatically at interpreter exit
+    """
+    # Also log to stdout
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+
+    if log_file:
+        if not os.path.exists("logs"):
+            os.makedirs("logs")
+
+        file_handler = RotatingFileHandler(
+            "logs/app.log",
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+        )
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.insert(0, file_handler)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter({logging.INFO: float(os.getenv("LOG_INFO_SAMPLE_RATE", 1.0))})
+    )
+    # Flask's default handler would still write synchronously on the request thread
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+    return listener
@@ -0,0 +1,209 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import Blueprint, Flask, Response, request
+from sqlalchemy import Engine, event
+
+from models import db
+
+metrics = Blueprint("metrics", __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            sep = "," if labels else ""
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Per-process request and database metrics, rendered in the Prometheus text format.
+    Every process of a multi-worker server keeps and exposes its own values.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.query_count: Dict[Tuple[str, str], Histogram] = {}
+        self.query_time: Dict[Tuple[str, str], Histogram] = {}
+
+    def record(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        seconds: float,
+        queries: int,
+        query_seconds: float,
+    ) -> None:
+        key = (route, method)
+        with self._lock:
+            status_key = (route, method, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            for histograms, buckets, value in (
+                (self.latency, LATENCY_BUCKETS, seconds),
+                (self.query_count, QUERY_COUNT_BUCKETS, queries),
+                (self.query_time, LATENCY_BUCKETS, query_seconds),
+            ):
+                if key not in histograms:
+                    histograms[key] = Histogram(buckets)
+                histograms[key].observe(value)
+
+    def render(self) -> str:
+        def labels(route: str, method: str) -> str:
+            route = route.replace("\\", "\\\\").replace('"', '\\"')
+            return f'route="{route}",method="{method}"'
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{{labels(route, method)},status="{status}"}}'
+                    f" {count}"
+                )
+            for name, help_text, histograms in (
+                (
+                    "http_request_duration_seconds",
+                    "Request latency, by route.",
+                    self.latency,
+                ),
+                (
+                    "db_queries_per_request",
+                    "Database queries issued per request.",
+                    self.query_count,
+                ),
+                (
+                    "db_query_duration_seconds_per_request",
+                    "Time spent in database queries per request.",
+                    self.query_time,
+                ),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (route, method), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.lines(name, labels(route, method)))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class _RequestTiming:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.query_start = 0.0
+
+
+# Query counters of the request being handled. A context variable is per thread
+# and per asyncio task, and SQLAlchemy carries it into the greenlets of its async
+# engine, so concurrent requests of either kind never share one.
+_current: ContextVar[Optional[_RequestTiming]] = ContextVar(
+    "request_timing", default=None
+)
+
+
+def _before_cursor_execute(*args) -> None:
+    if timing := _current.get():
+        timing.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(*args) -> None:
+    if timing := _current.get():
+        timing.queries += 1
+        timing.query_seconds += time.perf_counter() - timing.query_start
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Counts the queries of every request on the engine; for an async engine, pass
+    its sync_engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request() -> None:
+    _current.set(_RequestTiming())
+
+
+def finish_request(route: str, method: str, status: int) -> None:
+    """
+    Records the request started by start_request() in the current context, once.
+    :param route: the route pattern, which keeps label cardinality bounded
+    """
+    if (timing := _current.get()) is None:
+        return
+    _current.set(None)
+    registry.record(
+        route,
+        method,
+        status,
+        time.perf_counter() - timing.start,
+        timing.queries,
+        timing.query_seconds,
+    )
+
+
+def _before_request() -> None:
+    start_request()
+
+
+def _finish(status: int) -> None:
+    # The URL rule keeps label cardinality bounded, unlike the raw path
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    finish_request(route, request.method, status)
+
+
+def _after_request(response: Response) -> Response:
+    _finish(response.status_code)
+    return response
+
+
+def _teardown_request(exc: Optional[BaseException]) -> None:
+    # after_request is skipped when a view raises an unhandled exception
+    _finish(500)
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Instruments every request of the app and every query on its database engine.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        instrument_engine(db.engine)
+    app.register_blueprint(metrics)
+
+
+@metrics.route("/metrics")
+def get_metrics() -> Response:
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
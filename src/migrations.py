@@ -0,0 +1,213 @@
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Connection
+
+from models import context_hash, db, dialect_insert, utcnow
+
+logger = logging.getLogger("app")
+
+schema_migrations = db.Table(
+    "schema_migrations",
+    db.Column("version", db.Integer, primary_key=True),
+    db.Column("description", db.String(200), nullable=False),
+    db.Column("applied_at", db.DateTime, nullable=False),
+)
+
+# Serializes concurrent upgrades of one Postgres database
+ADVISORY_LOCK_KEY = 4145_0003
+
+
+# The schema as released with version 1. It is spelled out here rather than taken
+# from the models, so later model changes cannot alter what this version creates
+_schema_v1 = db.MetaData()
+
+db.Table(
+    "context",
+    _schema_v1,
+    db.Column("hash", db.String(64), primary_key=True),
+    db.Column("text", db.String(10000), nullable=False),
+)
+
+db.Table(
+    "classification_question",
+    _schema_v1,
+    db.Column("id", db.String(36), primary_key=True),
+    db.Column("query", db.String(10000), nullable=False),
+    db.Column(
+        "context1_hash", db.String(64), db.ForeignKey("context.hash"), nullable=False
+    ),
+    db.Column(
+        "context2_hash", db.String(64), db.ForeignKey("context.hash"), nullable=False
+    ),
+    db.Column("response", db.String(10000), nullable=False),
+)
+
+db.Table(
+    "user_response",
+    _schema_v1,
+    db.Column("id", db.String(36), primary_key=True),
+    db.Column(
+        "question_id",
+        db.String(36),
+        db.ForeignKey("classification_question.id"),
+        nullable=False,
+    ),
+    db.Column("time", db.DateTime, nullable=False),
+    db.Column("worker_id", db.String(24), nullable=False),
+    db.Column("is_faithful", db.Boolean, nullable=False),
+    db.Column("is_relevant", db.Boolean, nullable=False),
+    db.Column("faithfulness", db.String(1000), nullable=False),
+    db.Column("relevance", db.String(1000), nullable=False),
+    db.Column("comments", db.String(1000)),
+    db.Index("ix_user_response_question_id_time", "question_id", "time"),
+    db.Index("ix_user_response_worker_id_time", "worker_id", "time"),
+)
+
+db.Table(
+    "counter",
+    _schema_v1,
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("value", db.Integer, nullable=False),
+)
+
+
+def _create_schema(conn: Connection) -> None:
+    # Databases from before the migrations already hold some of these tables, which
+    # are skipped; their inline contexts are moved by migration 2
+    _schema_v1.create_all(conn)
+    for table in _schema_v1.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _move_inline_contexts(conn: Connection, batch_size: int = 500) -> None:
+    # Databases created before the context table keep the context texts inline;
+    # move them into the context table and reference them by hash
+    table = "classification_question"
+    columns = {c["name"] for c in db.inspect(conn).get_columns(table)}
+    if "context1" not in columns:
+        return
+
+    for column in ("context1_hash", "context2_hash"):
+        if column not in columns:
+            conn.execute(
+                db.text(f"ALTER TABLE {table} ADD COLUMN {column} VARCHAR(64)")
+            )
+
+    # Keyset batches over id, so only one batch of rows is held at a time
+    select = f"SELECT id, context1, context2 FROM {table}"
+    first = db.text(f"{select} ORDER BY id LIMIT :limit")
+    following = db.text(f"{select} WHERE id > :after ORDER BY id LIMIT :limit")
+    update = db.text(
+        f"UPDATE {table} SET context1_hash = :h1, context2_hash = :h2 WHERE id = :id"
+    )
+    context = _schema_v1.tables["context"]
+    insert = dialect_insert(context).on_conflict_do_nothing(
+        index_elements=[context.c.hash]
+    )
+    batch = conn.execute(first, {"limit": batch_size}).all()
+    while batch:
+        texts = {text for row in batch for text in (row.context1, row.context2)}
+        conn.execute(insert, [{"hash": context_hash(t), "text": t} for t in texts])
+        conn.execute(
+            update,
+            [
+                {
+                    "id": row.id,
+                    "h1": context_hash(row.context1),
+                    "h2": context_hash(row.context2),
+                }
+                for row in batch
+            ],
+        )
+        params = {"after": batch[-1].id, "limit": batch_size}
+        batch = conn.execute(following, params).all()
+
+    conn.execute(db.text(f"ALTER TABLE {table} DROP COLUMN context1"))
+    conn.execute(db.text(f"ALTER TABLE {table} DROP COLUMN context2"))
+    if conn.dialect.name == "postgresql":
+        # SQLite cannot add constraints to an existing table
+        for column in ("context1_hash", "context2_hash"):
+            conn.execute(
+                db.text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+            )
+            conn.execute(
+                db.text(
+                    f"ALTER TABLE {table} ADD FOREIGN KEY ({column})"
+                    " REFERENCES context (hash)"
+                )
+            )
+
+
+# Append only: a released migration must never change, nor read the models, since
+# databases that already applied it will not run it again
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Create the tables and indexes", _create_schema),
+    (2, "Move inline question contexts into the context table", _move_inline_contexts),
+]
+
+
+def current_version() -> int:
+    with db.engine.connect() as conn:
+        if not db.inspect(conn).has_table(schema_migrations.name):
+            return 0
+        return conn.scalar(db.select(db.func.max(schema_migrations.c.version))) or 0
+
+
+def _lock(conn: Connection) -> None:
+    # Held until the transaction ends. Only Postgres databases are shared by several
+    # processes; SQLite is for tests and single-process runs
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            db.text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+        )
+
+
+def upgrade() -> List[int]:
+    """
+    Applies the pending migrations in order, each in its own transaction together
+    with its entry in schema_migrations. Needs an application context.
+    :return: the versions that were applied
+    """
+    with db.engine.begin() as conn:
+        # Under the lock too, or concurrent first upgrades race on CREATE TABLE
+        _lock(conn)
+        schema_migrations.create(conn, checkfirst=True)
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        with db.engine.begin() as conn:
+            _lock(conn)
+            done = conn.scalar(
+                db.select(schema_migrations.c.version).where(
+                    schema_migrations.c.version == version
+                )
+            )
+            if done is not None:
+                continue
+            logger.info("Applying migration %s: %s", version, description)
+            migrate(conn)
+            conn.execute(
+                schema_migrations.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=utcnow(),
+                )
+            )
+            applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from app import create_app
+
+    # The explicit migration step of a FAST_START deployment
+    load_dotenv()
+    app = create_app(fast_start=True)
+    with app.app_context():
+        versions = upgrade()
+        print(f"Applied migrations {versions}" if versions else "Schema up to date")
+        print(f"Schema version {current_version()}")
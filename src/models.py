@@ -1,36 +1,110 @@
+import hashlib
 import uuid
 from datetime import UTC, datetime
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Sequence
 
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
 
 
+def dialect_insert(model: Any) -> Any:
+    # ON CONFLICT support lives in the dialect-specific insert constructs, which are
+    # imported on first use to keep them off the startup path
+    if db.engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
+
+def utcnow() -> datetime:
+    # Naive UTC, matching the timezone-less DateTime columns; drivers such as
+    # asyncpg refuse aware values for them
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def context_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Context(db.Model):
+    """
+    A context snippet, stored once and addressed by the SHA-256 of its text.
+    Rows are immutable, so clients can cache them by hash indefinitely.
+    """
+
+    hash = db.Column(db.String(64), primary_key=True)
+    text = db.Column(db.String(10000), nullable=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hash": self.hash,
+            "text": self.text,
+        }
+
+
+def store_contexts(texts: Iterable[str]) -> None:
+    # Existing rows already hold the same text, so conflicts are simply skipped
+    rows = [{"hash": context_hash(t), "text": t} for t in set(texts)]
+    if rows:
+        stmt = dialect_insert(Context).on_conflict_do_nothing(
+            index_elements=[Context.hash]
+        )
+        db.session.execute(stmt, rows)
+
+
 class ClassificationQuestion(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     query = db.Column(db.String(10000), nullable=False)
-    context1 = db.Column(db.String(10000), nullable=False)
-    context2 = db.Column(db.String(10000), nullable=False)
+    context1_hash = db.Column(
+        db.String(64), db.ForeignKey("context.hash"), nullable=False
+    )
+    context2_hash = db.Column(
+        db.String(64), db.ForeignKey("context.hash"), nullable=False
+    )
     response = db.Column(db.String(10000), nullable=False)
     responses = db.relationship("UserResponse", backref="question", lazy=True)
+    # Loaded on access only: the routes read contexts through select_questions(),
+    # and existence checks need no context rows
+    context1_ref = db.relationship(Context, foreign_keys=[context1_hash])
+    context2_ref = db.relationship(Context, foreign_keys=[context2_hash])
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "query": self.query,
-            "context1": self.context1,
-            "context2": self.context2,
-            "response": self.response,
-        }
+    @property
+    def context1(self) -> str:
+        return self.context1_ref.text
+
+    @property
+    def context2(self) -> str:
+        return self.context2_ref.text
+
+    # Every field of to_dict; the hashes let clients cache contexts through /contexts
+    FIELDS = (
+        "id",
+        "query",
+        "context1",
+        "context2",
+        "response",
+        "context1_hash",
+        "context2_hash",
+    )
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        # Only the selected attributes are read, so unloaded columns stay unloaded
+        return {field: getattr(self, field) for field in fields or self.FIELDS}
 
 
 class UserResponse(db.Model):
+    __table_args__ = (
+        db.Index("ix_user_response_question_id_time", "question_id", "time"),
+        db.Index("ix_user_response_worker_id_time", "worker_id", "time"),
+    )
+
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     question_id = db.Column(
         db.String(36), db.ForeignKey("classification_question.id"), nullable=False
     )
-    time = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    time = db.Column(db.DateTime, nullable=False, default=utcnow)
     worker_id = db.Column(db.String(24), nullable=False)
     is_faithful = db.Column(db.Boolean, nullable=False)
     is_relevant = db.Column(db.Boolean, nullable=False)
@@ -38,18 +112,23 @@ class UserResponse(db.Model):
     relevance = db.Column(db.String(1000), nullable=False)
     comments = db.Column(db.String(1000))
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "question_id": self.question_id,
-            "time": self.time.isoformat(),
-            "worker_id": self.worker_id,
-            "is_faithful": self.is_faithful,
-            "is_relevant": self.is_relevant,
-            "faithfulness": self.faithfulness,
-            "relevance": self.relevance,
-            "comments": self.comments,
-        }
+    FIELDS = (
+        "id",
+        "question_id",
+        "time",
+        "worker_id",
+        "is_faithful",
+        "is_relevant",
+        "faithfulness",
+        "relevance",
+        "comments",
+    )
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        result = {field: getattr(self, field) for field in fields or self.FIELDS}
+        if "time" in result:
+            result["time"] = result["time"].isoformat()
+        return result
 
 
 class Counter(db.Model):
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+from datetime import UTC, datetime
+from typing import Any, List, Optional, Sequence
+from urllib.parse import urlencode
+
+from flask import Response, abort, current_app, request
+
+from serialization import dumps
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque cursor.
+    :param values: the JSON-serializable key values of the last row
+    :return: a URL-safe cursor string
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _cursor_value(value: Any, column: Any) -> Any:
+    # Timestamps travel as ISO strings; every other value must already have the
+    # Python type of its column, so the database never compares mismatched types
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    elif isinstance(value, python_type) and not isinstance(value, bool):
+        return value
+    abort(400, description="Invalid cursor")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """
+    Decodes a cursor produced by `encode_cursor`, aborting with 400 if it is malformed.
+    :param cursor: the cursor string received from the client
+    :param columns: the key columns the cursor values are compared against, in order
+    :return: the decoded key values, converted to the Python types of the columns
+    """  # noqa: E501
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error):
+        abort(400, description="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(columns):
+        abort(400, description="Invalid cursor")
+    return [_cursor_value(value, column) for value, column in zip(values, columns)]
+
+
+def parse_limit() -> int:
+    """
+    Reads the `limit` query parameter, defaulting to DEFAULT_LIMIT and capped at MAX_LIMIT.
+    """  # noqa: E501
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        abort(400, description="Invalid limit")
+    if limit < 1:
+        abort(400, description="Invalid limit")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_datetime(name: str) -> Optional[datetime]:
+    """
+    Reads an ISO-8601 timestamp from the query parameter `name`, if present.
+    """
+    if (value := request.args.get(name)) is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f"Invalid {name}")
+    # Timestamps are stored as naive UTC, so compare in UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+    return parsed
+
+
+def paginated(items: List[Any], next_cursor: Optional[str]) -> Response:
+    """
+    Builds the JSON list response for a page, advertising the next page through the
+    `X-Next-Cursor` and `Link` headers so the body keeps its plain-list shape.
+    """
+    # Encoded with dumps() directly, so row timestamps come out in ISO format
+    resp = current_app.response_class(dumps(items), mimetype="application/json")
+    return link_next(resp, next_cursor)
+
+
+def link_next(resp: Response, next_cursor: Optional[str]) -> Response:
+    """
+    Adds the `X-Next-Cursor` and `Link` headers for the page after this one, if any.
+    """
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+        args = request.args.to_dict()
+        args["after"] = next_cursor
+        resp.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return resp
@@ -0,0 +1,76 @@
+import gzip
+import os
+from typing import Optional
+
+from flask import Flask, Response, request
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain"}
+
+# Compressed bodies keyed by (ETag, encoding); cached question and context bodies
+# are sent many times, so each is compressed only once. Pages make some bodies
+# large, so the total size is bounded too
+_compressed = LRUCache(maxsize=512, maxbytes=16 * 1024 * 1024)
+
+
+def _choose_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        # Low brotli qualities are fast enough for dynamic responses
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def init_compression(app: Flask) -> None:
+    """
+    Compresses JSON and text responses of at least COMPRESS_MIN_SIZE bytes with
+    brotli, when installed and accepted by the client, or otherwise gzip.
+    """
+    min_size = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    level = int(os.getenv("COMPRESS_LEVEL", 5))
+
+    @app.after_request
+    def compress(response: Response) -> Response:
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not 200 <= response.status_code < 300
+            or response.status_code == 204
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if not (encoding := _choose_encoding()):
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        if key is None or (body := _compressed.get(key)) is None:
+            body = _compress(data, encoding, level)
+            if key is not None:
+                _compressed.set(key, body, len(body))
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        if etag:
+            # The encoded bytes differ, so the tag can only match weakly; that
+            # still lets If-None-Match revalidate the cached copy
+            response.set_etag(etag, weak=True)
+        return response
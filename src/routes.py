@@ -1,12 +1,89 @@
-from typing import Any, Dict, List
-
-from flask import Blueprint, abort, current_app, jsonify, request
-from sqlalchemy import func
-
-from models import ClassificationQuestion, Counter, UserResponse, db
+import json
+import random
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from flask import Blueprint, Response, abort, current_app, request
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import context_cache, page_cache, question_cache
+from models import (
+    ClassificationQuestion,
+    Context,
+    Counter,
+    UserResponse,
+    context_hash,
+    db,
+    dialect_insert,
+    store_contexts,
+)
+from pagination import (
+    decode_cursor,
+    encode_cursor,
+    link_next,
+    paginated,
+    parse_datetime,
+    parse_limit,
+)
+from scheduler import answer_query, scheduler
+from serialization import (
+    CachedBody,
+    dumps,
+    parse_fields,
+    question_fields,
+    records,
+    select_questions,
+    select_responses,
+    serialize_body,
+)
 
 api = Blueprint("api", __name__)
 
+QUESTION_FIELDS = ["query", "context1", "context2", "response"]
+CONTEXT_FIELDS = ["context1", "context2"]
+# Columns that values of each question field are stored in
+QUESTION_COLUMNS = {
+    "query": ClassificationQuestion.__table__.c.query,
+    "context1": Context.__table__.c.text,
+    "context2": Context.__table__.c.text,
+    "response": ClassificationQuestion.__table__.c.response,
+}
+RESPONSE_FIELDS = [
+    "question_id",
+    "worker_id",
+    "is_faithful",
+    "is_relevant",
+    "faithfulness",
+    "relevance",
+]
+# Columns a client may set on a response; id and time are assigned by the server
+RESPONSE_COLUMNS = {
+    column.name: column
+    for column in UserResponse.__table__.columns
+    if column.name not in ("id", "time")
+}
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/ndjson"}
+MAX_BULK_ITEMS = 5000
+# Longest valid bulk row, at up to 4 bytes per UTF-8 character plus room for the
+# keys and punctuation; the app caps request bodies at MAX_BULK_ITEMS of these
+MAX_ROW_BYTES = (
+    4
+    * max(
+        sum(column.type.length for column in QUESTION_COLUMNS.values()),
+        sum(
+            column.type.length
+            for column in RESPONSE_COLUMNS.values()
+            if isinstance(column.type, db.String)
+        ),
+    )
+    + 1024
+)
+MAX_BODY_BYTES = MAX_BULK_ITEMS * MAX_ROW_BYTES
+MAX_CONTEXT_HASHES = 100
+# Context bodies are addressed by their content, so they can be cached for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 @api.route("/")
 def home() -> Dict[str, str]:
@@ -14,37 +91,148 @@ def home() -> Dict[str, str]:
     return {"message": "Hello world"}
 
 
+def _send_cached(entry: CachedBody, cache_control: Optional[str] = None) -> Response:
+    # Strong ETag over the exact bytes; make_conditional answers If-None-Match
+    resp = current_app.response_class(entry.body, mimetype="application/json")
+    resp.set_etag(entry.etag)
+    if cache_control:
+        resp.headers["Cache-Control"] = cache_control
+    link_next(resp, entry.next_cursor)
+    return resp.make_conditional(request)
+
+
+def _question_record(id: str, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    query = select_questions(fields).where(ClassificationQuestion.id == id)
+    if (row := db.session.execute(query).first()) is None:
+        return None
+    return records(fields, [row])[0]
+
+
+def _question_entry(
+    id: str, fields: Optional[List[str]] = None
+) -> Optional[CachedBody]:
+    if fields is not None:
+        # Only complete bodies are cached; projections are cheap to query instead
+        record = _question_record(id, fields)
+        return serialize_body(record) if record else None
+    if (entry := question_cache.get(id)) is None:
+        if not (record := _question_record(id, ClassificationQuestion.FIELDS)):
+            return None
+        entry = serialize_body(record)
+        question_cache.set(id, entry)
+    return entry
+
+
+def _question_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Column values of a question, with its contexts replaced by their hashes
+    return {
+        "query": data["query"],
+        "context1_hash": context_hash(data["context1"]),
+        "context2_hash": context_hash(data["context2"]),
+        "response": data["response"],
+    }
+
+
+def _invalidate_questions(*ids: str) -> None:
+    for question_id in ids:
+        question_cache.pop(question_id)
+    page_cache.clear()
+
+
+@api.route("/healthz")
+def healthz() -> Dict[str, str]:
+    # Liveness only: no database access and no logging
+    return {"status": "ok"}
+
+
+@api.route("/readyz")
+def readyz() -> tuple[Dict[str, str], int]:
+    try:
+        db.session.execute(db.text("SELECT 1"))
+    except SQLAlchemyError:
+        current_app.logger.warning("Readiness check failed", exc_info=True)
+        return {"status": "unavailable"}, 503
+    return {"status": "ok"}, 200
+
+
 @api.route("/questions", methods=["GET"])
-def get_questions() -> List[Dict[str, Any]]:
-    current_app.logger.info("Fetching all questions")
-    questions = db.session.execute(db.select(ClassificationQuestion)).scalars()
-    questions_list = [q.to_dict() for q in questions]
-    current_app.logger.info(f"Retrieved {len(questions_list)} questions")
-    return jsonify(questions_list)
+def get_questions() -> Response:
+    current_app.logger.info("Fetching page of questions")
+    limit = parse_limit()
+    after = request.args.get("after")
+    fields = question_fields()
+    cache_key = (limit, after, tuple(fields) if fields else None)
+    if entry := page_cache.get(cache_key):
+        current_app.logger.info("Served question page from cache")
+        return _send_cached(entry)
+
+    # Plain rows of the selected columns, serialized without loading ORM objects
+    fields = fields or ClassificationQuestion.FIELDS
+    query = select_questions(fields).order_by(ClassificationQuestion.id)
+    if after:
+        (after_id,) = decode_cursor(after, [ClassificationQuestion.id])
+        query = query.where(ClassificationQuestion.id > after_id)
+
+    # Fetch one extra row to learn whether another page follows
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].id])
+
+    questions_list = records(fields, rows)
+    current_app.logger.info("Retrieved %s questions", len(questions_list))
+    entry = serialize_body(questions_list, next_cursor)
+    page_cache.set(cache_key, entry, len(entry.body))
+    return _send_cached(entry)
 
 
 @api.route("/questions/<string:id>", methods=["GET"])
-def get_question(id: str) -> Dict[str, Any]:
-    current_app.logger.info(f"Fetching question with id: {id}")
-    if question := db.session.get(ClassificationQuestion, id):
-        current_app.logger.info(f"Found question {id}")
-        return question.to_dict()
-    current_app.logger.warning(f"Question {id} not found")
+def get_question(id: str) -> Response:
+    current_app.logger.info("Fetching question with id: %s", id)
+    if entry := _question_entry(id, question_fields()):
+        current_app.logger.info("Found question %s", id)
+        return _send_cached(entry)
+    current_app.logger.warning("Question %s not found", id)
     abort(404)
 
 
 @api.route("/questions/random", methods=["GET"])
 def get_random_question() -> Dict[str, Any]:
     current_app.logger.info("Fetching random question")
-    if question := db.session.execute(
-        db.select(ClassificationQuestion).order_by(func.random()).limit(1)
-    ).scalar():
-        current_app.logger.info(f"Retrieved random question {question.id}")
-        return question.to_dict()
+    fields = question_fields() or ClassificationQuestion.FIELDS
+    query = select_questions(fields).order_by(func.random()).limit(1)
+    if row := db.session.execute(query).first():
+        current_app.logger.info("Retrieved random question %s", row.id)
+        return records(fields, [row])[0]
     current_app.logger.warning("No questions available for random selection")
     abort(404)
 
 
+@api.route("/questions/assign", methods=["GET"])
+def assign_question() -> Response:
+    if not (worker_id := request.args.get("worker_id")):
+        current_app.logger.warning("Question assignment requested without worker_id")
+        abort(400)
+
+    fields = question_fields()
+    scheduler.ensure_loaded()
+    while question_id := scheduler.assign(worker_id):
+        # Another process may have stored the answer or deleted the question since
+        # the scheduler was loaded; either drops it from this worker's candidates
+        if db.session.execute(answer_query(worker_id, question_id)).first():
+            scheduler.record_response(worker_id, question_id)
+        elif entry := _question_entry(question_id, fields):
+            current_app.logger.info(
+                "Assigned question %s to %s", question_id, worker_id
+            )
+            return _send_cached(entry)
+        else:
+            scheduler.remove_question(question_id)
+    current_app.logger.warning("No unanswered questions left for worker %s", worker_id)
+    abort(404)
+
+
 @api.route("/questions", methods=["POST"])
 def create_question() -> tuple[Dict[str, Any], int]:
     if not request.is_json:
@@ -52,65 +240,258 @@ def create_question() -> tuple[Dict[str, Any], int]:
         abort(400)
 
     data = request.get_json()
-    required_fields = ["query", "context1", "context2", "response"]
-    if not all(field in data for field in required_fields):
+    if not isinstance(data, dict):
+        abort(400)
+    if not all(field in data for field in QUESTION_FIELDS):
         current_app.logger.warning(
-            "Missing required fields in question creation:"
-            f"{[f for f in required_fields if f not in data]}"
+            "Missing required fields in question creation: %s",
+            [f for f in QUESTION_FIELDS if f not in data],
         )
         abort(400)
-
-    question = ClassificationQuestion(**{k: data[k] for k in required_fields})
+    # Checked before the contexts are hashed and stored
+    data = {k: data[k] for k in QUESTION_FIELDS}
+    if error := validate_item(data, QUESTION_FIELDS, QUESTION_COLUMNS):
+        current_app.logger.warning("Invalid question: %s", error)
+        abort(400, description=error)
+
+    store_contexts(data[k] for k in CONTEXT_FIELDS)
+    question = ClassificationQuestion(**_question_row(data))
     db.session.add(question)
     db.session.commit()
-    current_app.logger.info(f"Created new question with id: {question.id}")
+    _invalidate_questions()
+    scheduler.add_question(question.id)
+    current_app.logger.info("Created new question with id: %s", question.id)
 
     return question.to_dict(), 201
 
 
+def _read_bulk_items() -> List[Any]:
+    # Aborts with 413 as soon as more than MAX_BULK_ITEMS items have been read; a
+    # body over MAX_CONTENT_LENGTH is refused by Werkzeug before it is read at all
+    if request.mimetype in NDJSON_MIMETYPES:
+        items: List[Any] = []
+        # A line is read up to one byte past the limit, never in full
+        while line := request.stream.readline(MAX_ROW_BYTES + 1):
+            if len(line) > MAX_ROW_BYTES:
+                current_app.logger.warning(
+                    "Bulk upload line over %s bytes", MAX_ROW_BYTES
+                )
+                abort(413)
+            if not line.strip():
+                continue
+            if len(items) == MAX_BULK_ITEMS:
+                # Stop before buffering the rest of an oversized body
+                current_app.logger.warning("Bulk upload over %s items", MAX_BULK_ITEMS)
+                abort(413)
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                # Keep the position so per-item results still line up
+                items.append(None)
+    else:
+        if not request.is_json:
+            abort(400)
+        if not isinstance(items := request.get_json(), list):
+            abort(400)
+        if len(items) > MAX_BULK_ITEMS:
+            current_app.logger.warning("Bulk upload of %s items", len(items))
+            abort(413)
+    if not items:
+        abort(400, description="No items")
+    return items
+
+
+def validate_item(
+    item: Any, fields: List[str], columns: Dict[str, Any]
+) -> Optional[str]:
+    # Reject rows the database would refuse, so one bad item cannot fail the batch.
+    # Only the given columns may be set; ids and timestamps are assigned here.
+    if not isinstance(item, dict):
+        return "Expected an object"
+    if missing := [f for f in fields if f not in item]:
+        return f"Missing fields: {missing}"
+    if unknown := [k for k in item if k not in columns]:
+        return f"Unknown fields: {unknown}"
+    invalid = []
+    for field, value in item.items():
+        column = columns[field]
+        if value is None:
+            valid = column.nullable
+        elif isinstance(column.type, db.Boolean):
+            valid = isinstance(value, bool)
+        elif isinstance(column.type, db.String):
+            length = column.type.length
+            valid = isinstance(value, str) and (length is None or len(value) <= length)
+        else:
+            valid = isinstance(value, column.type.python_type)
+        if not valid:
+            invalid.append(field)
+    if invalid:
+        return f"Invalid fields: {invalid}"
+    return None
+
+
+@api.route("/questions/bulk", methods=["POST"])
+def create_questions_bulk() -> tuple[Dict[str, Any], int]:
+    items = _read_bulk_items()
+
+    results: List[Dict[str, Any]] = []
+    rows: List[Dict[str, Any]] = []
+    contexts: Set[str] = set()
+    for index, item in enumerate(items):
+        if error := validate_item(item, QUESTION_FIELDS, QUESTION_COLUMNS):
+            results.append({"index": index, "status": 400, "error": error})
+            continue
+        row = {"id": str(uuid.uuid4()), **_question_row(item)}
+        rows.append(row)
+        contexts.update(item[k] for k in CONTEXT_FIELDS)
+        results.append({"index": index, "status": 201, "id": row["id"]})
+
+    if rows:
+        # One executemany, batched by SQLAlchemy into multi-row INSERTs; each
+        # distinct context is written once however many questions share it
+        store_contexts(contexts)
+        db.session.execute(db.insert(ClassificationQuestion), rows)
+        db.session.commit()
+        _invalidate_questions()
+        for row in rows:
+            scheduler.add_question(row["id"])
+
+    current_app.logger.info(
+        "Bulk created %s questions (%s rejected)", len(rows), len(items) - len(rows)
+    )
+    status = 201 if len(rows) == len(items) else 207
+    return {"created": len(rows), "results": results}, status
+
+
 @api.route("/questions/<string:id>", methods=["PUT"])
 def update_question(id: str) -> Dict[str, Any]:
-    current_app.logger.info(f"Attempting to update question {id}")
+    current_app.logger.info("Attempting to update question %s", id)
     if not request.is_json:
         current_app.logger.warning(
-            f"Received non-JSON request for question update {id}"
+            "Received non-JSON request for question update %s", id
         )
         abort(400)
 
     if not (question := db.session.get(ClassificationQuestion, id)):
-        current_app.logger.warning(f"Question {id} not found for update")
+        current_app.logger.warning("Question %s not found for update", id)
         abort(404)
 
     data = request.get_json()
-    for field in ["query", "context1", "context2", "response"]:
-        if field in data:
+    if not isinstance(data, dict):
+        abort(400)
+    data = {k: data[k] for k in QUESTION_FIELDS if k in data}
+    if error := validate_item(data, [], QUESTION_COLUMNS):
+        current_app.logger.warning("Invalid update of question %s: %s", id, error)
+        abort(400, description=error)
+
+    # A replaced context stays in the context table: clients may have cached it by
+    # hash, and other questions may still reference it
+    for field in data:
+        if field in CONTEXT_FIELDS:
+            store_contexts([data[field]])
+            setattr(question, f"{field}_hash", context_hash(data[field]))
+        else:
             setattr(question, field, data[field])
 
     db.session.commit()
-    current_app.logger.info(f"Successfully updated question {id}")
+    _invalidate_questions(id)
+    current_app.logger.info("Successfully updated question %s", id)
     return question.to_dict()
 
 
 @api.route("/questions/<string:id>", methods=["DELETE"])
 def delete_question(id: str) -> tuple[str, int]:
-    current_app.logger.info(f"Attempting to delete question {id}")
+    current_app.logger.info("Attempting to delete question %s", id)
     if not (question := db.session.get(ClassificationQuestion, id)):
-        current_app.logger.warning(f"Question {id} not found for deletion")
+        current_app.logger.warning("Question %s not found for deletion", id)
         abort(404)
 
     db.session.delete(question)
     db.session.commit()
-    current_app.logger.info(f"Successfully deleted question {id}")
+    _invalidate_questions(id)
+    scheduler.remove_question(id)
+    current_app.logger.info("Successfully deleted question %s", id)
     return "", 204
 
 
+@api.route("/contexts/<string:hash>", methods=["GET"])
+def get_context(hash: str) -> Response:
+    if (entry := context_cache.get(hash)) is None:
+        if not (context := db.session.get(Context, hash)):
+            current_app.logger.warning("Context %s not found", hash)
+            abort(404)
+        # The hash already identifies the exact body, so it doubles as the ETag
+        entry = CachedBody(dumps(context.to_dict()), hash)
+        context_cache.set(hash, entry)
+    return _send_cached(entry, IMMUTABLE_CACHE_CONTROL)
+
+
+@api.route("/contexts", methods=["GET"])
+def get_contexts() -> Dict[str, Any]:
+    # Resolves the hashes of a page fetched with ?contexts=hash in one round trip
+    hashes = request.args.getlist("hash")
+    if not hashes or len(hashes) > MAX_CONTEXT_HASHES:
+        abort(400, description=f"Pass between 1 and {MAX_CONTEXT_HASHES} hashes")
+    contexts = db.session.execute(
+        db.select(Context).where(Context.hash.in_(set(hashes)))
+    ).scalars()
+    return {"contexts": {c.hash: c.text for c in contexts}}
+
+
+def _responses_page(*filters: Any) -> Response:
+    # Keyset page over (time, id); with an equality filter on question_id or
+    # worker_id this is served by the matching composite index
+    limit = parse_limit()
+    fields = parse_fields(UserResponse.FIELDS) or UserResponse.FIELDS
+    # The trailing time column feeds the cursor even when time is not returned
+    query = (
+        select_responses(fields)
+        .add_columns(UserResponse.time.label("cursor_time"))
+        .where(*filters)
+        .order_by(UserResponse.time, UserResponse.id)
+    )
+    if (since := parse_datetime("since")) is not None:
+        query = query.where(UserResponse.time >= since)
+    if after := request.args.get("after"):
+        after_time, after_id = decode_cursor(
+            after, [UserResponse.time, UserResponse.id]
+        )
+        query = query.where(
+            tuple_(UserResponse.time, UserResponse.id) > tuple_(after_time, after_id)
+        )
+
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.cursor_time.isoformat(), last.id])
+
+    responses_list = records(fields, rows)
+    current_app.logger.info("Retrieved %s responses", len(responses_list))
+    return paginated(responses_list, next_cursor)
+
+
 @api.route("/responses", methods=["GET"])
-def get_responses() -> List[Dict[str, Any]]:
-    current_app.logger.info("Fetching all responses")
-    responses = db.session.execute(db.select(UserResponse)).scalars()
-    responses_list = [r.to_dict() for r in responses]
-    current_app.logger.info(f"Retrieved {len(responses_list)} responses")
-    return jsonify(responses_list)
+def get_responses() -> Response:
+    current_app.logger.info("Fetching page of responses")
+    return _responses_page()
+
+
+@api.route("/questions/<string:id>/responses", methods=["GET"])
+def get_question_responses(id: str) -> Response:
+    current_app.logger.info("Fetching responses for question %s", id)
+    if not _question_entry(id):
+        current_app.logger.warning("Question %s not found", id)
+        abort(404)
+    return _responses_page(UserResponse.question_id == id)
+
+
+@api.route("/workers/<string:worker_id>/responses", methods=["GET"])
+def get_worker_responses(worker_id: str) -> Response:
+    current_app.logger.info("Fetching responses by worker %s", worker_id)
+    return _responses_page(UserResponse.worker_id == worker_id)
 
 
 @api.route("/responses", methods=["POST"])
@@ -120,67 +501,127 @@ def create_response() -> tuple[Dict[str, Any], int]:
         abort(400)
 
     data = request.get_json()
-    required_fields = [
-        "question_id",
-        "worker_id",
-        "is_faithful",
-        "is_relevant",
-        "faithfulness",
-        "relevance",
-    ]
-    if not all(field in data for field in required_fields):
+    if not isinstance(data, dict) or not all(f in data for f in RESPONSE_FIELDS):
         current_app.logger.warning(
-            "Missing required fields in response creation:"
-            f"{[f for f in required_fields if f not in data]}"
+            "Missing required fields in response creation: %s",
+            [f for f in RESPONSE_FIELDS if not isinstance(data, dict) or f not in data],
         )
         abort(400)
 
+    # Create response with optional comments field
+    response_data = {k: data[k] for k in RESPONSE_FIELDS}
+    if "comments" in data:
+        response_data["comments"] = data["comments"]
+    if error := validate_item(response_data, RESPONSE_FIELDS, RESPONSE_COLUMNS):
+        current_app.logger.warning("Invalid response: %s", error)
+        abort(400, description=error)
+
     # Verify question exists
     if not db.session.get(ClassificationQuestion, data["question_id"]):
         current_app.logger.warning(
-            f"Question {data['question_id']} not found for response creation"
+            "Question %s not found for response creation", data["question_id"]
         )
         abort(404, description="Question not found")
 
-    # Create response with optional comments field
-    response_data = {k: data[k] for k in required_fields}
-    if "comments" in data:
-        response_data["comments"] = data["comments"]
-
     response = UserResponse(**response_data)
     db.session.add(response)
     db.session.commit()
+    scheduler.record_response(response.worker_id, response.question_id)
     current_app.logger.info(
-        "Created new response for question"
-        f"{data['question_id']} by worker {data['worker_id']}"
+        "Created new response for question %s by worker %s",
+        data["question_id"],
+        data["worker_id"],
     )
 
     return response.to_dict(), 201
 
 
+@api.route("/responses/batch", methods=["POST"])
+def create_responses_batch() -> tuple[Dict[str, Any], int]:
+    items = _read_bulk_items()
+
+    results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        if error := validate_item(item, RESPONSE_FIELDS, RESPONSE_COLUMNS):
+            results.append({"index": index, "status": 400, "error": error})
+        else:
+            # Every row carries the same keys, as executemany requires
+            row = {k: item[k] for k in RESPONSE_FIELDS}
+            row["comments"] = item.get("comments")
+            results.append({"index": index, "status": 201, "row": row})
+
+    # Verify all referenced questions exist with a single IN query
+    question_ids = {r["row"]["question_id"] for r in results if "row" in r}
+    existing = set(
+        db.session.execute(
+            db.select(ClassificationQuestion.id).where(
+                ClassificationQuestion.id.in_(question_ids)
+            )
+        ).scalars()
+    )
+
+    rows: List[Dict[str, Any]] = []
+    for result in results:
+        if (row := result.pop("row", None)) is None:
+            continue
+        if row["question_id"] not in existing:
+            result.update(status=404, error="Question not found")
+            continue
+        row["id"] = result["id"] = str(uuid.uuid4())
+        rows.append(row)
+
+    if rows:
+        db.session.execute(db.insert(UserResponse), rows)
+        db.session.commit()
+        for row in rows:
+            scheduler.record_response(row["worker_id"], row["question_id"])
+
+    current_app.logger.info(
+        "Batch created %s responses (%s rejected)", len(rows), len(items) - len(rows)
+    )
+    status = 201 if len(rows) == len(items) else 207
+    return {"created": len(rows), "results": results}, status
+
+
+def _increment_shard(shard_id: int) -> int:
+    # Single-statement upsert: creates the row if missing, otherwise bumps it in
+    # place under the row lock, so concurrent increments are never lost
+    stmt = dialect_insert(Counter).values(id=shard_id, value=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Counter.id], set_={"value": Counter.value + 1}
+    ).returning(Counter.value)
+    return db.session.execute(stmt).scalar_one()
+
+
+def _counter_total() -> int:
+    return db.session.execute(
+        db.select(func.coalesce(func.sum(Counter.value), 0))
+    ).scalar_one()
+
+
 @api.route("/counter", methods=["GET"])
 def get_counter() -> Dict[str, Any]:
     current_app.logger.info("Fetching counter value")
-    counter = db.session.execute(db.select(Counter).where(Counter.id == 1)).scalar()
-    if not counter:
-        counter = Counter(id=1, value=0)
-        db.session.add(counter)
-        db.session.commit()
-        current_app.logger.info("Initialized new counter with value 0")
-    else:
-        current_app.logger.info(f"Retrieved counter value: {counter.value}")
-    return counter.to_dict()
+    value = _counter_total()
+    current_app.logger.info("Retrieved counter value: %s", value)
+    return {"id": 1, "value": value}
 
 
 @api.route("/counter/increment", methods=["POST"])
 def increment_counter() -> Dict[str, Any]:
     current_app.logger.info("Incrementing counter")
-    counter = db.session.execute(db.select(Counter).where(Counter.id == 1)).scalar()
-    if not counter:
-        counter = Counter(id=1, value=0)
-        db.session.add(counter)
-        current_app.logger.info("Initialized new counter")
-    counter.value += 1
+    shards = current_app.config.get("COUNTER_SHARDS", 1)
+    if shards > 1:
+        # Spread writers over several rows; the total is the sum of all shards.
+        # Concurrent callers can read the same total, so the value unique to this
+        # increment is the (shard, shard_value) pair
+        shard = random.randint(1, shards)
+        shard_value = _increment_shard(shard)
+        db.session.commit()
+        value = _counter_total()
+        current_app.logger.info("Counter incremented to %s", value)
+        return {"id": 1, "value": value, "shard": shard, "shard_value": shard_value}
+    value = _increment_shard(1)
     db.session.commit()
-    current_app.logger.info(f"Counter incremented to {counter.value}")
-    return counter.to_dict()
+    current_app.logger.info("Counter incremented to %s", value)
+    return {"id": 1, "value": value}
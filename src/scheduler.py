@@ -0,0 +1,264 @@
+import asyncio
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from sqlalchemy import Select, func
+
+from models import ClassificationQuestion, UserResponse, db
+
+if TYPE_CHECKING:
+    # The asyncio extension needs greenlet, which only the async mode installs
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _counts_query() -> Select:
+    return (
+        db.select(ClassificationQuestion.id, func.count(UserResponse.id))
+        .outerjoin(UserResponse)
+        .group_by(ClassificationQuestion.id)
+    )
+
+
+def _answered_query() -> Select:
+    return db.select(UserResponse.worker_id, UserResponse.question_id)
+
+
+def answer_query(worker_id: str, question_id: str) -> Select:
+    """
+    Finds the worker's response to a question, which another process may have stored
+    since the last rebuild. Served by the (worker_id, time) index.
+    """
+    return (
+        db.select(UserResponse.id)
+        .where(
+            UserResponse.worker_id == worker_id,
+            UserResponse.question_id == question_id,
+        )
+        .limit(1)
+    )
+
+
+class AssignmentScheduler:
+    """
+    Hands each worker the least-answered question they have not answered yet.
+
+    Response counts live in a min-heap with lazy invalidation, so an assignment costs
+    O(log n) plus one pop per question the worker already answered, instead of sorting
+    the whole question table. Questions handed out but not yet answered count towards
+    their load for pending_ttl seconds, so a burst of workers is spread over different
+    questions while abandoned assignments eventually stop counting.
+
+    The state is per process and is periodically rebuilt from the database, which
+    keeps several server processes from drifting apart for long. Changes recorded
+    while a rebuild reads the database are replayed on top of its snapshot. Until
+    then, the routes check each assignment against the database with answer_query(),
+    since the answer may have been stored, or the question deleted, by another
+    process.
+    """
+
+    def __init__(
+        self, refresh_seconds: float = 60.0, pending_ttl: float = 600.0
+    ) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.pending_ttl = pending_ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._async_load_lock = asyncio.Lock()
+        self._counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._answered: Dict[str, Set[str]] = {}
+        # Assigned question and monotonic assignment time by worker
+        self._pending: Dict[str, Tuple[str, float]] = {}
+        self._loads = 0
+        self._journal: List[Tuple[Callable[..., None], Tuple[str, ...]]] = []
+        self._loaded_at: Optional[float] = None
+
+    def _push(self, question_id: str) -> None:
+        heapq.heappush(self._heap, (self._counts[question_id], question_id))
+
+    def _apply(self, change: Callable[..., None], *args: str) -> None:
+        # Called with the lock held; a rebuild in progress replays the change later
+        change(*args)
+        if self._loads:
+            self._journal.append((change, args))
+
+    def load(
+        self, counts: Iterable[Tuple[str, int]], answered: Iterable[Tuple[str, str]]
+    ) -> None:
+        """
+        Replaces the scheduler state.
+        :param counts: (question_id, response_count) pairs for every question
+        :param answered: (worker_id, question_id) pairs for every stored response
+        """
+        with self._lock:
+            self._counts = dict(counts)
+            self._answered = {}
+            for worker_id, question_id in answered:
+                self._answered.setdefault(worker_id, set()).add(question_id)
+            # Keep in-flight assignments that were made before the rebuild
+            now = time.monotonic()
+            for worker_id, (question_id, assigned_at) in list(self._pending.items()):
+                if (
+                    question_id not in self._counts
+                    or question_id in self._answered.get(worker_id, ())
+                    or now - assigned_at > self.pending_ttl
+                ):
+                    del self._pending[worker_id]
+                else:
+                    self._counts[question_id] += 1
+            self._heap = [(count, qid) for qid, count in self._counts.items()]
+            heapq.heapify(self._heap)
+            # Changes made since the snapshot was read; each is idempotent, so those
+            # the snapshot already holds are no-ops
+            for change, args in self._journal:
+                change(*args)
+            self._loaded_at = time.monotonic()
+
+    @contextmanager
+    def _loading(self) -> Iterator[None]:
+        # Journals every change from before the snapshot is read until it is loaded
+        with self._lock:
+            self._loads += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._loads -= 1
+                if not self._loads:
+                    self._journal.clear()
+
+    def load_from_db(self) -> None:
+        with self._loading():
+            counts = db.session.execute(_counts_query()).all()
+            answered = db.session.execute(_answered_query()).all()
+            self.load(counts, answered)
+
+    async def load_from_async_session(self, session: "AsyncSession") -> None:
+        with self._loading():
+            counts = (await session.execute(_counts_query())).all()
+            answered = (await session.execute(_answered_query())).all()
+            self.load(counts, answered)
+
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    def ensure_loaded(self) -> None:
+        if not self.is_stale():
+            return
+        # Only the first load is waited for; while another thread refreshes the
+        # state, the current one stays in use
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self.is_stale():
+                self.load_from_db()
+        finally:
+            self._load_lock.release()
+
+    async def ensure_loaded_async(self, session: "AsyncSession") -> None:
+        if not self.is_stale():
+            return
+        if self._async_load_lock.locked() and self._loaded_at is not None:
+            return
+        async with self._async_load_lock:
+            if self.is_stale():
+                await self.load_from_async_session(session)
+
+    def _drop_pending(self, worker_id: str) -> None:
+        question_id, _ = self._pending.pop(worker_id)
+        if question_id in self._counts:
+            self._counts[question_id] -= 1
+            self._push(question_id)
+
+    def assign(self, worker_id: str) -> Optional[str]:
+        """
+        Picks the least-answered question the worker has not answered yet.
+        :param worker_id: the worker requesting a question
+        :return: the assigned question id, or None if the worker has answered them all
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (pending := self._pending.get(worker_id)) is not None:
+                question_id, assigned_at = pending
+                if (
+                    question_id in self._counts
+                    and now - assigned_at <= self.pending_ttl
+                ):
+                    return question_id
+                self._drop_pending(worker_id)
+
+            answered = self._answered.get(worker_id, set())
+            skipped: List[Tuple[int, str]] = []
+            chosen = None
+            while self._heap:
+                count, question_id = heapq.heappop(self._heap)
+                if self._counts.get(question_id) != count:
+                    continue  # stale entry, superseded or deleted
+                if question_id in answered:
+                    skipped.append((count, question_id))
+                    continue
+                chosen = question_id
+                break
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+
+            if chosen is not None:
+                self._counts[chosen] += 1
+                self._push(chosen)
+                self._pending[worker_id] = (chosen, now)
+            return chosen
+
+    def _record(self, worker_id: str, question_id: str) -> None:
+        if question_id not in self._counts:
+            return
+        answered = self._answered.setdefault(worker_id, set())
+        if question_id in answered:
+            return  # already counted, e.g. by the snapshot of a rebuild
+        pending = self._pending.get(worker_id)
+        if pending is not None and pending[0] == question_id:
+            # Already counted when it was assigned
+            del self._pending[worker_id]
+        else:
+            self._counts[question_id] += 1
+            self._push(question_id)
+        answered.add(question_id)
+
+    def record_response(self, worker_id: str, question_id: str) -> None:
+        with self._lock:
+            self._apply(self._record, worker_id, question_id)
+
+    def _add(self, question_id: str) -> None:
+        if question_id not in self._counts:
+            self._counts[question_id] = 0
+            self._push(question_id)
+
+    def add_question(self, question_id: str) -> None:
+        with self._lock:
+            if self._loaded_at is not None or self._loads:
+                self._apply(self._add, question_id)
+
+    def _remove(self, question_id: str) -> None:
+        self._counts.pop(question_id, None)
+
+    def remove_question(self, question_id: str) -> None:
+        with self._lock:
+            self._apply(self._remove, question_id)
+
+
+scheduler = AssignmentScheduler()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from flask import Response, abort, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Select
+from sqlalchemy.orm import aliased
+from werkzeug.datastructures import MultiDict
+
+from models import ClassificationQuestion, Context, UserResponse, db
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+QUESTION_COLUMNS = {
+    "id": ClassificationQuestion.id,
+    "query": ClassificationQuestion.query,
+    "response": ClassificationQuestion.response,
+    "context1_hash": ClassificationQuestion.context1_hash,
+    "context2_hash": ClassificationQuestion.context2_hash,
+}
+
+
+def _default(value: Any) -> Any:
+    # Same timestamp format as the to_dict methods, for both encoders
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Encodes payload as compact JSON with sorted keys, using orjson when installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        payload, default=_default, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with dumps(), so returning a dict from a view or
+    calling jsonify() skips the standard library encoder when orjson is available.
+    """
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self._app.debug:
+            # Keeps the indented output of the debug server
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    next_cursor: Optional[str] = None
+
+
+def serialize_body(payload: Any, next_cursor: Optional[str] = None) -> CachedBody:
+    body = dumps(payload)
+    return CachedBody(body, hashlib.sha1(body).hexdigest(), next_cursor)
+
+
+def parse_fields(
+    allowed: Sequence[str], args: Optional[MultiDict] = None
+) -> Optional[List[str]]:
+    """
+    Reads the `fields` query parameter, e.g. ?fields=query,response, aborting with 400
+    on unknown fields. id is always included.
+    :param allowed: the fields that may be selected
+    :param args: query parameters to read instead of those of the current Flask request
+    :return: the selected fields, or None if all fields were requested
+    """  # noqa: E501
+    args = request.args if args is None else args
+    if (value := args.get("fields")) is None:
+        return None
+    fields = ["id"]
+    for field in value.split(","):
+        if (field := field.strip()) and field not in fields:
+            fields.append(field)
+    if unknown := [f for f in fields if f not in allowed]:
+        abort(400, description=f"Unknown fields: {unknown}")
+    return fields
+
+
+def question_fields(args: Optional[MultiDict] = None) -> Optional[List[str]]:
+    # Like parse_fields, with ?contexts=hash leaving out the context texts
+    args = request.args if args is None else args
+    fields = parse_fields(ClassificationQuestion.FIELDS, args)
+    if (contexts := args.get("contexts", "text")) not in ("text", "hash"):
+        abort(400, description="contexts must be 'text' or 'hash'")
+    if contexts == "hash":
+        fields = [
+            f
+            for f in fields or ClassificationQuestion.FIELDS
+            if f not in ("context1", "context2")
+        ]
+    return fields
+
+
+def select_questions(fields: Sequence[str]) -> Select:
+    """
+    Selects the columns behind the given question fields, labelled with the field
+    names, joining in a context's text only when that context was selected.
+    """
+    query = db.select().select_from(ClassificationQuestion)
+    for field in fields:
+        if field in ("context1", "context2"):
+            context = aliased(Context, name=field)
+            query = query.add_columns(context.text.label(field)).join(
+                context,
+                context.hash == getattr(ClassificationQuestion, f"{field}_hash"),
+            )
+        else:
+            query = query.add_columns(QUESTION_COLUMNS[field].label(field))
+    return query
+
+
+def select_responses(fields: Sequence[str]) -> Select:
+    return db.select(*(getattr(UserResponse, field) for field in fields))
+
+
+def records(fields: Sequence[str], rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    # Rows may carry extra trailing columns, e.g. for a cursor; zip leaves them out
+    return [dict(zip(fields, row)) for row in rows]
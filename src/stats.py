@@ -0,0 +1,98 @@
+from typing import Any, Dict, Optional
+
+from flask import Blueprint, Response, current_app, jsonify
+from sqlalchemy import Integer, cast, func
+
+from models import ClassificationQuestion, UserResponse, db
+
+stats = Blueprint("stats", __name__, url_prefix="/stats")
+
+
+def _isoformat(value: Optional[Any]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _span_seconds(first: Optional[Any], last: Optional[Any]) -> Optional[float]:
+    return (last - first).total_seconds() if first is not None else None
+
+
+@stats.route("", methods=["GET"])
+def get_summary() -> Dict[str, Any]:
+    current_app.logger.info("Computing summary statistics")
+    question_count = db.session.execute(
+        db.select(func.count(ClassificationQuestion.id))
+    ).scalar_one()
+    response_count, worker_count, first, last = db.session.execute(
+        db.select(
+            func.count(UserResponse.id),
+            func.count(func.distinct(UserResponse.worker_id)),
+            func.min(UserResponse.time),
+            func.max(UserResponse.time),
+        )
+    ).one()
+    return {
+        "questions": question_count,
+        "responses": response_count,
+        "workers": worker_count,
+        "first_response": _isoformat(first),
+        "last_response": _isoformat(last),
+        "span_seconds": _span_seconds(first, last),
+    }
+
+
+@stats.route("/questions", methods=["GET"])
+def get_question_stats() -> Response:
+    current_app.logger.info("Computing per-question statistics")
+    rows = db.session.execute(
+        db.select(
+            ClassificationQuestion.id,
+            func.count(UserResponse.id),
+            func.avg(cast(UserResponse.is_faithful, Integer)),
+            func.avg(cast(UserResponse.is_relevant, Integer)),
+            func.min(UserResponse.time),
+            func.max(UserResponse.time),
+        )
+        .outerjoin(UserResponse)
+        .group_by(ClassificationQuestion.id)
+        .order_by(ClassificationQuestion.id)
+    )
+    return jsonify(
+        [
+            {
+                "question_id": question_id,
+                "responses": count,
+                "faithful_fraction": float(faithful) if faithful is not None else None,
+                "relevant_fraction": float(relevant) if relevant is not None else None,
+                "first_response": _isoformat(first),
+                "last_response": _isoformat(last),
+            }
+            for question_id, count, faithful, relevant, first, last in rows
+        ]
+    )
+
+
+@stats.route("/workers", methods=["GET"])
+def get_worker_stats() -> Response:
+    current_app.logger.info("Computing per-worker statistics")
+    rows = db.session.execute(
+        db.select(
+            UserResponse.worker_id,
+            func.count(UserResponse.id),
+            func.min(UserResponse.time),
+            func.max(UserResponse.time),
+        )
+        .group_by(UserResponse.worker_id)
+        .order_by(UserResponse.worker_id)
+    )
+    return jsonify(
+        [
+            {
+                "worker_id": worker_id,
+                "responses": count,
+                "first_response": _isoformat(first),
+                "last_response": _isoformat(last),
+                "span_seconds": _span_seconds(first, last),
+            }
+            for worker_id, count, first, last in rows
+        ]
+    )
@@ -0,0 +1,8 @@
+import time
+
+# Taken before the imports, so the startup timing includes them
+started = time.perf_counter()
+
+from app import create_app  # noqa: E402
+
+app = create_app(started=started)
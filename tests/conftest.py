@@ -0,0 +1,66 @@
+from typing import Any, Dict, Iterator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from app import create_app
+from cache import context_cache, page_cache, question_cache
+from metrics import registry
+from models import db
+from scheduler import scheduler
+
+
+@pytest.fixture
+def app(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[Flask]:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("LOG_FILE", "false")
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    # The caches and metrics are per process, so they would otherwise outlive each
+    # database
+    for cache in (question_cache, page_cache, context_cache):
+        cache.clear()
+    scheduler.__init__()
+    registry.__init__()
+
+    app = create_app()
+    yield app
+
+    with app.app_context():
+        db.engine.dispose()
+    app.logger.handlers.clear()
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    return app.test_client()
+
+
+def question_data(n: int = 0) -> Dict[str, str]:
+    return {
+        "query": f"query {n}",
+        "context1": f"first context {n}",
+        "context2": f"second context {n}",
+        "response": f"response {n}",
+    }
+
+
+def response_data(question_id: str, worker_id: str = "worker") -> Dict[str, Any]:
+    return {
+        "question_id": question_id,
+        "worker_id": worker_id,
+        "is_faithful": True,
+        "is_relevant": False,
+        "faithfulness": "grounded",
+        "relevance": "off topic",
+    }
+
+
+@pytest.fixture
+def make_question(client: FlaskClient) -> Any:
+    def make(n: int = 0) -> Dict[str, Any]:
+        resp = client.post("/questions", json=question_data(n))
+        assert resp.status_code == 201
+        return resp.get_json()
+
+    return make
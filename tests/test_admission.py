@@ -0,0 +1,96 @@
+from typing import Any
+
+import pytest
+from conftest import response_data
+from flask.testing import FlaskClient
+
+from admission import Limits, RouteLimiter, TokenBucket, limiters, load_limits
+
+
+def test_token_bucket_allows_a_burst_then_reports_the_wait() -> None:
+    bucket = TokenBucket(rate=1.0, burst=2)
+
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert 0 < bucket.take() <= 1.0
+
+
+def test_concurrency_limit_rejects_until_released() -> None:
+    limiter = RouteLimiter(Limits(concurrency=1))
+
+    assert limiter.admit() is None
+    assert limiter.admit() == (503, 1.0)
+    limiter.release()
+    assert limiter.admit() is None
+
+
+def test_worker_limit_is_per_worker() -> None:
+    limiter = RouteLimiter(Limits(worker_rate=0.1, worker_burst=1))
+
+    assert limiter.admit("a") is None
+    status, delay = limiter.admit("a")
+    assert status == 429 and delay > 0
+    assert limiter.admit("b") is None
+
+
+def test_limits_can_be_overridden(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(
+        "ADMISSION_LIMITS",
+        '{"api.create_response": {"rate": 5, "burst": 10}, "api.get_counter": '
+        '{"concurrency": 3}}',
+    )
+
+    limits = load_limits()
+
+    assert limits["api.create_response"].rate == 5
+    # Fields without an override keep their defaults
+    assert limits["api.create_response"].worker_rate == 1.0
+    assert limits["api.get_counter"] == Limits(concurrency=3)
+
+
+def test_route_answers_429_with_retry_after(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    limiters["api.create_response"] = RouteLimiter(
+        Limits(worker_rate=0.1, worker_burst=1)
+    )
+
+    first = client.post("/responses", json=response_data(question["id"], "w"))
+    second = client.post("/responses", json=response_data(question["id"], "w"))
+    other = client.post("/responses", json=response_data(question["id"], "x"))
+
+    assert first.status_code == 201
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    assert other.status_code == 201
+
+
+def test_slots_are_released_after_each_request(client: FlaskClient) -> None:
+    limiters["api.increment_counter"] = RouteLimiter(Limits(concurrency=1))
+
+    statuses = [client.post("/counter/increment").status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 200]
+
+
+def test_slots_are_released_after_errors(client: FlaskClient) -> None:
+    limiters["api.create_response"] = RouteLimiter(Limits(concurrency=1))
+
+    statuses = [
+        client.post("/responses", json=response_data("missing")).status_code
+        for _ in range(2)
+    ]
+
+    assert statuses == [404, 404]
+
+
+def test_full_route_answers_503(client: FlaskClient) -> None:
+    limiter = RouteLimiter(Limits(concurrency=1))
+    limiters["api.increment_counter"] = limiter
+    limiter.admit()
+
+    resp = client.post("/counter/increment")
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
@@ -0,0 +1,68 @@
+from datetime import UTC, datetime
+from typing import Any, Iterator
+
+import pytest
+from conftest import question_data, response_data
+
+# The async mode and its test client are optional dependencies
+pytest.importorskip("a2wsgi")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+from async_app import create_asgi_app  # noqa: E402
+
+
+@pytest.fixture
+def asgi_client(app: Any) -> Iterator[TestClient]:
+    # create_asgi_app() builds its own Flask app on the database of the app fixture
+    with TestClient(create_asgi_app()) as client:
+        yield client
+
+
+def test_response_is_stored_with_a_naive_utc_time(asgi_client: TestClient) -> None:
+    question = asgi_client.post("/questions", json=question_data()).json()
+
+    resp = asgi_client.post("/responses", json=response_data(question["id"]))
+
+    assert resp.status_code == 201
+    stored = datetime.fromisoformat(resp.json()["time"])
+    assert stored.tzinfo is None
+    assert abs((datetime.now(UTC).replace(tzinfo=None) - stored).total_seconds()) < 60
+
+
+def test_invalid_response_is_rejected(asgi_client: TestClient) -> None:
+    question = asgi_client.post("/questions", json=question_data()).json()
+    valid = response_data(question["id"])
+
+    for invalid in (
+        {**valid, "is_faithful": "yes"},
+        {**valid, "worker_id": "w" * 25},
+        {**valid, "question_id": 5},
+    ):
+        assert asgi_client.post("/responses", json=invalid).status_code == 400
+    assert (
+        asgi_client.post(
+            "/responses", json={**valid, "question_id": "missing"}
+        ).status_code
+        == 404
+    )
+
+
+def test_async_routes_are_recorded_in_metrics(asgi_client: TestClient) -> None:
+    question = asgi_client.post("/questions", json=question_data()).json()
+    asgi_client.post("/responses", json=response_data(question["id"]))
+    asgi_client.get(f"/questions/{question['id']}?fields=query")
+    asgi_client.get("/questions/missing?fields=query")
+
+    metrics = asgi_client.get("/metrics").text
+
+    labels = 'route="/questions/<string:id>",method="GET"'
+    assert f'http_requests_total{{{labels},status="200"}} 1' in metrics
+    assert f'http_requests_total{{{labels},status="404"}} 1' in metrics
+    responses = 'route="/responses",method="POST"'
+    assert f'http_requests_total{{{responses},status="201"}} 1' in metrics
+    # The queries of the async engine are counted, e.g. the lookup of each question
+    assert f'db_queries_per_request_bucket{{{labels},le="0"}} 0' in metrics
+    assert f"db_queries_per_request_count{{{labels}}} 2" in metrics
@@ -0,0 +1,98 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+from conftest import question_data
+from flask import Flask
+from flask.testing import FlaskClient
+
+import routes
+
+NDJSON = "application/x-ndjson"
+
+
+def _ndjson(items: List[Any]) -> str:
+    return "\n".join(json.dumps(item) for item in items)
+
+
+def test_bulk_questions_are_created(client: FlaskClient) -> None:
+    resp = client.post("/questions/bulk", json=[question_data(n) for n in range(3)])
+
+    assert resp.status_code == 201
+    body: Dict[str, Any] = resp.get_json()
+    assert body["created"] == 3
+    assert len(client.get("/questions").get_json()) == 3
+
+
+def test_bad_ndjson_items_are_reported_per_item(client: FlaskClient) -> None:
+    lines = [json.dumps(question_data(0)), "{not json", json.dumps({"query": "q"})]
+
+    resp = client.post("/questions/bulk", data="\n".join(lines), content_type=NDJSON)
+
+    assert resp.status_code == 207
+    statuses = [r["status"] for r in resp.get_json()["results"]]
+    assert statuses == [201, 400, 400]
+
+
+def test_invalid_field_types_are_rejected_per_item(client: FlaskClient) -> None:
+    items = [question_data(0), {**question_data(1), "context1": 5}]
+
+    resp = client.post("/questions/bulk", json=items)
+
+    assert resp.status_code == 207
+    assert [r["status"] for r in resp.get_json()["results"]] == [201, 400]
+
+
+@pytest.mark.parametrize("body", ["[]", "", "\n\n"])
+def test_empty_upload_is_rejected(client: FlaskClient, body: str) -> None:
+    content_type = "application/json" if body == "[]" else NDJSON
+
+    resp = client.post("/questions/bulk", data=body, content_type=content_type)
+
+    assert resp.status_code == 400
+
+
+def test_oversized_upload_is_rejected(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(routes, "MAX_BULK_ITEMS", 2)
+    items = [question_data(n) for n in range(3)]
+
+    assert client.post("/questions/bulk", json=items).status_code == 413
+    resp = client.post("/questions/bulk", data=_ndjson(items), content_type=NDJSON)
+    assert resp.status_code == 413
+    assert client.get("/questions").get_json() == []
+
+
+def test_body_over_the_content_length_is_refused_unread(
+    app: Flask, client: FlaskClient
+) -> None:
+    app.config["MAX_CONTENT_LENGTH"] = 100
+    items = [question_data(n) for n in range(3)]
+
+    assert client.post("/questions/bulk", json=items).status_code == 413
+    resp = client.post("/questions/bulk", data=_ndjson(items), content_type=NDJSON)
+    assert resp.status_code == 413
+
+
+def test_overlong_ndjson_line_is_rejected(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(routes, "MAX_ROW_BYTES", 50)
+    items = [question_data(0)]
+
+    resp = client.post("/questions/bulk", data=_ndjson(items), content_type=NDJSON)
+
+    assert resp.status_code == 413
+    assert client.get("/questions").get_json() == []
+
+
+def test_content_length_allows_a_full_batch_of_the_longest_rows(app: Flask) -> None:
+    longest = {
+        field: "\U0001f600" * column.type.length
+        for field, column in routes.QUESTION_COLUMNS.items()
+    }
+    row = json.dumps(longest, ensure_ascii=False).encode()
+
+    assert len(row) <= routes.MAX_ROW_BYTES
+    assert app.config["MAX_CONTENT_LENGTH"] >= routes.MAX_BULK_ITEMS * len(row)
@@ -0,0 +1,90 @@
+import time
+from typing import Any
+
+from flask.testing import FlaskClient
+
+from cache import LRUCache, page_cache
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl() -> None:
+    cache = LRUCache(ttl=0.01)
+    cache.set("a", 1)
+
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_total_size_is_bounded() -> None:
+    cache = LRUCache(maxbytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=30)
+
+    cache.set("c", "z", size=30)
+
+    assert cache.get("a") is None
+    assert cache.total_bytes == 60
+    cache.pop("b")
+    cache.set("c", "z", size=10)
+    assert cache.total_bytes == 10
+
+
+def test_entry_larger_than_the_cache_is_not_stored() -> None:
+    cache = LRUCache(maxbytes=100)
+    cache.set("a", "x", size=50)
+
+    cache.set("b", "y", size=101)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x"
+
+
+def test_question_pages_stay_within_the_byte_budget(
+    client: FlaskClient, make_question: Any
+) -> None:
+    for n in range(5):
+        make_question(n)
+    page_cache.maxbytes = 4096
+
+    for limit in range(1, 40):
+        assert client.get(f"/questions?limit={limit}").status_code == 200
+
+    assert 0 < page_cache.total_bytes <= 4096
+
+
+def test_conditional_get_returns_304(client: FlaskClient, make_question: Any) -> None:
+    question = make_question()
+    url = f"/questions/{question['id']}"
+    etag = client.get(url).headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_update_invalidates_cached_question(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    url = f"/questions/{question['id']}"
+    etag = client.get(url).headers["ETag"]
+    client.get("/questions")
+
+    client.put(url, json={"query": "changed"})
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json()["query"] == "changed"
+    assert client.get("/questions").get_json()[0]["query"] == "changed"
@@ -0,0 +1,102 @@
+import gzip
+from typing import Any
+
+from conftest import question_data
+from flask.testing import FlaskClient
+
+from models import context_hash
+
+
+def test_question_references_its_contexts_by_hash(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+
+    assert question["context1_hash"] == context_hash(question["context1"])
+    resp = client.get(f"/contexts/{question['context1_hash']}")
+    assert resp.status_code == 200
+    assert resp.get_json()["text"] == question["context1"]
+    assert "immutable" in resp.headers["Cache-Control"]
+    etag = resp.headers["ETag"]
+    again = client.get(
+        f"/contexts/{question['context1_hash']}", headers={"If-None-Match": etag}
+    )
+    assert again.status_code == 304
+
+
+def test_contexts_can_be_left_out_and_fetched_in_bulk(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+
+    slim = client.get(f"/questions/{question['id']}?contexts=hash").get_json()
+    assert "context1" not in slim and "context2" not in slim
+
+    hashes = [slim["context1_hash"], slim["context2_hash"]]
+    resp = client.get(f"/contexts?hash={hashes[0]}&hash={hashes[1]}")
+    assert resp.get_json()["contexts"] == {
+        hashes[0]: question["context1"],
+        hashes[1]: question["context2"],
+    }
+
+
+def test_context_lookups_are_bounded(client: FlaskClient) -> None:
+    assert client.get("/contexts").status_code == 400
+    many = "&".join(f"hash={n}" for n in range(101))
+    assert client.get(f"/contexts?{many}").status_code == 400
+    assert client.get("/contexts/unknown").status_code == 404
+
+
+def test_shared_contexts_are_stored_once(
+    client: FlaskClient, make_question: Any
+) -> None:
+    first = make_question()
+    second = client.post(
+        "/questions", json={**question_data(1), "context1": first["context1"]}
+    ).get_json()
+
+    assert second["context1_hash"] == first["context1_hash"]
+
+
+def test_invalid_contexts_are_rejected_before_storing(client: FlaskClient) -> None:
+    resp = client.post("/questions", json={**question_data(), "context1": 5})
+
+    assert resp.status_code == 400
+    assert client.get("/questions").get_json() == []
+
+
+def test_invalid_update_is_rejected(client: FlaskClient, make_question: Any) -> None:
+    question = make_question()
+    url = f"/questions/{question['id']}"
+
+    assert client.put(url, json={"context2": ["a"]}).status_code == 400
+    assert client.put(url, json={"query": None}).status_code == 400
+    assert client.get(url).get_json() == question
+
+
+def test_replaced_context_is_updated(client: FlaskClient, make_question: Any) -> None:
+    question = make_question()
+
+    updated = client.put(
+        f"/questions/{question['id']}", json={"context1": "new context"}
+    ).get_json()
+
+    assert updated["context1"] == "new context"
+    assert updated["context1_hash"] == context_hash("new context")
+
+
+def test_large_bodies_are_compressed(client: FlaskClient, make_question: Any) -> None:
+    for n in range(20):
+        make_question(n)
+
+    resp = client.get("/questions", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert len(gzip.decompress(resp.data)) > 1024
+    etag = resp.headers["ETag"]
+    assert etag.startswith("W/")
+    again = client.get(
+        "/questions", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert again.status_code == 304
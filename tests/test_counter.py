@@ -0,0 +1,20 @@
+from flask import Flask
+from flask.testing import FlaskClient
+
+
+def test_increments_return_unique_values(client: FlaskClient) -> None:
+    values = [client.post("/counter/increment").get_json()["value"] for _ in range(3)]
+
+    assert values == [1, 2, 3]
+    assert client.get("/counter").get_json()["value"] == 3
+
+
+def test_sharded_increments_are_unique_per_shard(app: Flask) -> None:
+    app.config["COUNTER_SHARDS"] = 4
+    client = app.test_client()
+
+    results = [client.post("/counter/increment").get_json() for _ in range(20)]
+
+    pairs = {(r["shard"], r["shard_value"]) for r in results}
+    assert len(pairs) == 20
+    assert client.get("/counter").get_json()["value"] == 20
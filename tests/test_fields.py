@@ -0,0 +1,94 @@
+from typing import Any, List
+
+from conftest import response_data
+from flask import Flask
+from flask.testing import FlaskClient
+
+from cache import page_cache
+from models import db
+from serialization import select_questions
+
+
+def _sql(app: Flask, fields: List[str]) -> str:
+    with app.app_context():
+        return str(select_questions(fields).compile(db.engine))
+
+
+def test_questions_return_only_the_selected_fields(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+
+    listed = client.get("/questions?fields=query,context2").get_json()
+    single = client.get(f"/questions/{question['id']}?fields=response").get_json()
+
+    assert listed == [
+        {"id": question["id"], "query": "query 0", "context2": "second context 0"}
+    ]
+    assert single == {"id": question["id"], "response": "response 0"}
+
+
+def test_only_selected_contexts_are_joined(app: Flask) -> None:
+    assert "JOIN" not in _sql(app, ["id", "query", "context1_hash"])
+    one = _sql(app, ["id", "context2"])
+    assert one.count("JOIN context") == 1 and "context2_hash" in one
+    assert _sql(app, ["id", "context1", "context2"]).count("JOIN context") == 2
+
+
+def test_context_hashes_replace_the_texts(
+    client: FlaskClient, make_question: Any
+) -> None:
+    make_question()
+
+    (question,) = client.get("/questions?contexts=hash").get_json()
+
+    assert "context1" not in question and "context2" not in question
+    assert len(question["context1_hash"]) == 64
+    assert client.get("/questions?contexts=both").status_code == 400
+
+
+def test_unknown_fields_are_rejected(client: FlaskClient, make_question: Any) -> None:
+    question = make_question()
+
+    assert client.get("/questions?fields=query,secret").status_code == 400
+    assert client.get(f"/questions/{question['id']}?fields=nope").status_code == 400
+    assert client.get("/responses?fields=password").status_code == 400
+    assert client.get("/questions/assign?worker_id=w&fields=x").status_code == 400
+
+
+def test_each_selection_is_cached_separately(
+    client: FlaskClient, make_question: Any
+) -> None:
+    make_question()
+
+    narrow = client.get("/questions?fields=query")
+    full = client.get("/questions")
+    again = client.get("/questions?fields=query")
+
+    assert len(page_cache) == 2
+    assert set(narrow.get_json()[0]) == {"id", "query"}
+    assert "context1" in full.get_json()[0]
+    assert again.headers["ETag"] == narrow.headers["ETag"] != full.headers["ETag"]
+
+
+def test_response_cursor_works_without_the_time_field(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    ids = {
+        client.post(
+            "/responses", json=response_data(question["id"], f"w{n}")
+        ).get_json()["id"]
+        for n in range(5)
+    }
+
+    seen, url = [], "/responses?limit=2&fields=worker_id"
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert all(set(row) == {"id", "worker_id"} for row in page)
+        seen.extend(row["id"] for row in page)
+        url = resp.headers.get("Link", "").split(";")[0].strip("<>")
+
+    assert sorted(seen) == sorted(ids)
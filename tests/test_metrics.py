@@ -0,0 +1,103 @@
+from typing import Any, Dict
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+
+def _samples(client: FlaskClient) -> Dict[str, float]:
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    samples = {}
+    for line in resp.get_data(as_text=True).splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_requests_are_counted_by_route_and_status(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    client.get(f"/questions/{question['id']}")
+    client.get("/questions/missing")
+
+    samples = _samples(client)
+
+    labels = 'route="/questions/<string:id>",method="GET"'
+    assert samples[f'http_requests_total{{{labels},status="200"}}'] == 1
+    assert samples[f'http_requests_total{{{labels},status="404"}}'] == 1
+    assert (
+        samples['http_requests_total{route="/questions",method="POST",status="201"}']
+        == 1
+    )
+
+
+def test_latency_histogram_is_cumulative(client: FlaskClient) -> None:
+    for _ in range(3):
+        client.get("/healthz")
+
+    samples = _samples(client)
+
+    labels = 'route="/healthz",method="GET"'
+    name = "http_request_duration_seconds"
+    buckets = [
+        value
+        for sample, value in samples.items()
+        if sample.startswith(f"{name}_bucket{{{labels},")
+    ]
+    assert buckets == sorted(buckets)
+    assert samples[f'{name}_bucket{{{labels},le="+Inf"}}'] == 3
+    assert samples[f"{name}_count{{{labels}}}"] == 3
+    assert samples[f"{name}_sum{{{labels}}}"] > 0
+
+
+def test_database_queries_are_counted_per_request(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    # One query per uncached lookup, none once the body is cached
+    client.get(f"/questions/{question['id']}")
+    client.get(f"/questions/{question['id']}")
+    client.get("/healthz")
+
+    samples = _samples(client)
+
+    labels = 'route="/questions/<string:id>",method="GET"'
+    name = "db_queries_per_request"
+    assert samples[f'{name}_bucket{{{labels},le="0"}}'] == 1
+    assert samples[f'{name}_bucket{{{labels},le="1"}}'] == 2
+    assert samples[f"{name}_sum{{{labels}}}"] == 1
+    assert samples[f'{name}_bucket{{route="/healthz",method="GET",le="0"}}'] == 1
+
+
+def test_unmatched_paths_share_one_label(client: FlaskClient) -> None:
+    client.get("/no/such/path")
+    client.get("/another/missing/path")
+
+    samples = _samples(client)
+
+    key = 'http_requests_total{route="<unmatched>",method="GET",status="404"}'
+    assert samples[key] == 2
+
+
+def test_unhandled_errors_are_recorded_on_teardown(
+    app: Flask, client: FlaskClient
+) -> None:
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    app.add_url_rule("/fail", view_func=fail)
+    # Let the exception escape, so after_request is skipped and only the teardown
+    # hook sees the request
+    app.testing = True
+
+    with pytest.raises(RuntimeError):
+        client.get("/fail")
+
+    samples = _samples(client)
+    assert samples['http_requests_total{route="/fail",method="GET",status="500"}'] == 1
+    assert (
+        samples['http_request_duration_seconds_count{route="/fail",method="GET"}'] == 1
+    )
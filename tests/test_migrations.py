@@ -0,0 +1,114 @@
+import time
+from typing import Any
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+
+from app import StartupTimer, create_app, database_uri
+from migrations import (
+    MIGRATIONS,
+    _move_inline_contexts,
+    current_version,
+    schema_migrations,
+    upgrade,
+)
+from models import Context, context_hash, db
+
+
+def test_inline_contexts_are_moved_in_batches(app: Flask, tmp_path: Any) -> None:
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE classification_question (id VARCHAR(36) PRIMARY KEY,"
+                " query TEXT, context1 TEXT, context2 TEXT, response TEXT)"
+            )
+        )
+        conn.execute(
+            sa.text(
+                "INSERT INTO classification_question VALUES"
+                " (:id, 'q', :c1, 'shared', 'r')"
+            ),
+            [{"id": f"q{n}", "c1": f"context {n}"} for n in range(5)],
+        )
+        Context.__table__.create(conn)
+
+    with app.app_context(), engine.begin() as conn:
+        _move_inline_contexts(conn, batch_size=2)
+
+    with engine.connect() as conn:
+        columns = {
+            c["name"] for c in sa.inspect(conn).get_columns("classification_question")
+        }
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, context1_hash, context2_hash FROM classification_question"
+            )
+        ).all()
+        contexts = dict(conn.execute(sa.text("SELECT hash, text FROM context")).all())
+    engine.dispose()
+
+    assert "context1" not in columns and "context2" not in columns
+    assert len(rows) == 5
+    for id, hash1, hash2 in rows:
+        assert contexts[hash1] == f"context {id[1:]}"
+        assert hash2 == context_hash("shared")
+    assert len(contexts) == 6
+
+
+def test_upgrade_records_each_version_once(app: Flask) -> None:
+    with app.app_context():
+        assert current_version() == len(MIGRATIONS)
+        assert upgrade() == []
+        with db.engine.connect() as conn:
+            versions = conn.scalars(db.select(schema_migrations.c.version)).all()
+
+    assert sorted(versions) == [version for version, _, _ in MIGRATIONS]
+
+
+def test_first_migration_matches_the_models(app: Flask) -> None:
+    with app.app_context(), db.engine.connect() as conn:
+        inspector = sa.inspect(conn)
+        for table in db.metadata.sorted_tables:
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            assert columns == set(table.columns.keys())
+            indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            assert indexes >= {index.name for index in table.indexes}
+
+
+def test_fast_start_does_no_schema_work(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'fast.db'}")
+
+    app = create_app(fast_start=True)
+
+    with app.app_context():
+        assert current_version() == 0
+        assert upgrade() == [version for version, _, _ in MIGRATIONS]
+        db.engine.dispose()
+    app.logger.handlers.clear()
+
+
+def test_missing_database_settings_are_named(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ("DB_USER", "DB_PASSWORD", "DB_NAME", "DB_HOST", "DB_SOCKET_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("DB_PORT", "5432")
+
+    with pytest.raises(RuntimeError, match="DB_USER, DB_PASSWORD, DB_NAME, DB_HOST"):
+        database_uri()
+
+
+def test_startup_timer_includes_the_imports() -> None:
+    started = time.perf_counter() - 0.5
+    timer = StartupTimer(started)
+    with timer.phase("flask"):
+        pass
+
+    pairs = (phase.split("=") for phase in timer.summary().split(", "))
+    phases = {name: float(ms) for name, ms in pairs}
+
+    assert list(phases) == ["imports", "flask", "total"]
+    assert phases["imports"] >= 500
+    assert phases["total"] >= phases["imports"] + phases["flask"]
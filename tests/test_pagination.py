@@ -0,0 +1,82 @@
+from typing import Any, List
+
+from conftest import response_data
+from flask.testing import FlaskClient
+
+from pagination import encode_cursor
+
+
+def _follow(client: FlaskClient, url: str) -> List[List[Any]]:
+    pages = []
+    while True:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        pages.append(resp.get_json())
+        if not (cursor := resp.headers.get("X-Next-Cursor")):
+            return pages
+        url = resp.headers["Link"].split(";")[0].strip("<>")
+        assert f"after={cursor}" in url
+
+
+def test_questions_pages_cover_every_question_once(
+    client: FlaskClient, make_question: Any
+) -> None:
+    ids = sorted(make_question(n)["id"] for n in range(5))
+
+    pages = _follow(client, "/questions?limit=2")
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [q["id"] for page in pages for q in page] == ids
+
+
+def test_responses_pages_cover_every_response_once(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    ids = []
+    for n in range(5):
+        resp = client.post("/responses", json=response_data(question["id"], f"w{n}"))
+        ids.append(resp.get_json()["id"])
+
+    pages = _follow(client, "/responses?limit=2")
+
+    assert sorted(r["id"] for page in pages for r in page) == sorted(ids)
+    assert all(len(page) <= 2 for page in pages)
+
+
+def test_last_page_has_no_cursor(client: FlaskClient, make_question: Any) -> None:
+    make_question()
+
+    resp = client.get("/questions?limit=1")
+
+    assert len(resp.get_json()) == 1
+    assert "X-Next-Cursor" not in resp.headers
+    assert "Link" not in resp.headers
+
+
+def test_malformed_cursor_is_rejected(client: FlaskClient) -> None:
+    assert client.get("/questions?after=not-a-cursor!").status_code == 400
+    assert (
+        client.get(f"/questions?after={encode_cursor(['a', 'b'])}").status_code == 400
+    )
+
+
+def test_cursor_values_must_match_the_key_columns(client: FlaskClient) -> None:
+    assert client.get(f"/questions?after={encode_cursor([5])}").status_code == 400
+    assert client.get(f"/questions?after={encode_cursor([None])}").status_code == 400
+    bad_time = encode_cursor(["yesterday", "id"])
+    assert client.get(f"/responses?after={bad_time}").status_code == 400
+    bad_id = encode_cursor(["2024-01-01T00:00:00", 5])
+    assert client.get(f"/responses?after={bad_id}").status_code == 400
+
+
+def test_limit_must_be_a_positive_integer(client: FlaskClient) -> None:
+    for limit in ("abc", "1.5", "0", "-1"):
+        assert client.get(f"/questions?limit={limit}").status_code == 400
+        assert client.get(f"/responses?limit={limit}").status_code == 400
+
+
+def test_limit_is_capped(client: FlaskClient, make_question: Any) -> None:
+    make_question()
+
+    assert client.get("/questions?limit=100000").status_code == 200
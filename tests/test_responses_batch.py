@@ -0,0 +1,69 @@
+from typing import Any
+
+from conftest import response_data
+from flask.testing import FlaskClient
+
+
+def test_batch_creates_every_valid_response(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    items = [response_data(question["id"], f"w{n}") for n in range(3)]
+    items[1]["comments"] = "unsure"
+
+    resp = client.post("/responses/batch", json=items)
+
+    assert resp.status_code == 201
+    assert resp.get_json()["created"] == 3
+    stored = client.get(f"/questions/{question['id']}/responses").get_json()
+    assert sorted(r["comments"] or "" for r in stored) == ["", "", "unsure"]
+
+
+def test_bad_items_are_rejected_per_item(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    valid = response_data(question["id"])
+    items = [
+        valid,
+        {**valid, "is_faithful": "yes"},
+        {**valid, "worker_id": "w" * 25},
+        {**valid, "question_id": "missing"},
+        {k: v for k, v in valid.items() if k != "relevance"},
+        "not an object",
+    ]
+
+    resp = client.post("/responses/batch", json=items)
+
+    assert resp.status_code == 207
+    statuses = [r["status"] for r in resp.get_json()["results"]]
+    assert statuses == [201, 400, 400, 404, 400, 400]
+
+
+def test_server_managed_and_unknown_keys_are_rejected(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    created = client.post("/responses", json=response_data(question["id"]))
+    # The shape GET /responses returns, including id and time
+    echoed = created.get_json()
+    unknown = {**response_data(question["id"]), "score": 3}
+
+    resp = client.post("/responses/batch", json=[echoed, unknown])
+
+    assert resp.status_code == 207
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == [400, 400]
+    assert "Unknown fields" in results[0]["error"]
+    assert "'score'" in results[1]["error"]
+
+
+def test_single_response_is_validated(client: FlaskClient, make_question: Any) -> None:
+    question = make_question()
+    valid = response_data(question["id"])
+
+    assert client.post("/responses", json={**valid, "relevance": 3}).status_code == 400
+    assert client.post("/responses", json=[valid]).status_code == 400
+    resp = client.post("/responses", json=valid)
+    assert resp.status_code == 201
+    assert "+" not in resp.get_json()["time"]
@@ -0,0 +1,179 @@
+import threading
+import time
+from typing import Any
+
+from conftest import response_data
+from flask import Flask
+from flask.testing import FlaskClient
+
+from cache import question_cache
+from models import ClassificationQuestion, UserResponse, db, utcnow
+from scheduler import AssignmentScheduler, scheduler
+
+
+def _scheduler(*question_ids: str, **kwargs: Any) -> AssignmentScheduler:
+    loaded = AssignmentScheduler(**kwargs)
+    loaded.load([(qid, 0) for qid in question_ids], [])
+    return loaded
+
+
+def test_concurrent_workers_get_different_questions() -> None:
+    scheduler = _scheduler("a", "b", "c")
+
+    assigned = {scheduler.assign(f"w{n}") for n in range(3)}
+
+    assert assigned == {"a", "b", "c"}
+
+
+def test_least_answered_question_comes_first() -> None:
+    scheduler = AssignmentScheduler()
+    scheduler.load([("a", 3), ("b", 1), ("c", 2)], [])
+
+    assert scheduler.assign("w") == "b"
+
+
+def test_worker_never_gets_an_answered_question() -> None:
+    scheduler = _scheduler("a", "b")
+    scheduler.record_response("w", "a")
+
+    assert scheduler.assign("w") == "b"
+    scheduler.record_response("w", "b")
+    assert scheduler.assign("w") is None
+
+
+def test_pending_assignment_is_handed_out_again() -> None:
+    scheduler = _scheduler("a", "b")
+
+    assert scheduler.assign("w") == scheduler.assign("w")
+
+
+def test_expired_assignment_stops_counting() -> None:
+    scheduler = _scheduler("a", "b", pending_ttl=600)
+    assert scheduler.assign("w1") == "a"
+    assert scheduler.assign("w2") == "b"
+
+    scheduler.pending_ttl = 0
+    time.sleep(0.001)
+    scheduler.load([("a", 0), ("b", 0)], [])
+
+    # Neither abandoned assignment inflates its question any longer
+    assert scheduler.assign("w3") == "a"
+    assert scheduler.assign("w4") == "b"
+
+
+def test_expired_assignment_is_replaced_for_its_worker() -> None:
+    scheduler = _scheduler("a", "b", pending_ttl=0)
+    scheduler.assign("w1")
+    time.sleep(0.001)
+
+    scheduler.assign("w1")
+
+    assert scheduler._counts == {"a": 1, "b": 0}
+
+
+def test_response_is_counted_once() -> None:
+    scheduler = _scheduler("a", "b")
+
+    scheduler.record_response("w", "a")
+    scheduler.record_response("w", "a")
+
+    assert scheduler._counts["a"] == 1
+
+
+def test_changes_during_a_rebuild_are_replayed() -> None:
+    scheduler = _scheduler("a", "b")
+
+    with scheduler._loading():
+        # Recorded after the snapshot below was read
+        scheduler.record_response("w", "a")
+        scheduler.add_question("c")
+        scheduler.remove_question("b")
+        scheduler.load([("a", 0), ("b", 0)], [])
+
+    assert scheduler._counts == {"a": 1, "c": 0}
+    assert scheduler.assign("w") == "c"
+
+
+def test_changes_already_in_the_snapshot_are_not_counted_twice() -> None:
+    scheduler = _scheduler("a")
+
+    with scheduler._loading():
+        scheduler.record_response("w", "a")
+        scheduler.load([("a", 1)], [("w", "a")])
+
+    assert scheduler._counts == {"a": 1}
+
+
+def test_concurrent_first_requests_load_once() -> None:
+    scheduler = AssignmentScheduler()
+    loads = []
+
+    def load_from_db() -> None:
+        loads.append(1)
+        time.sleep(0.05)
+        scheduler.load([("a", 0)], [])
+
+    scheduler.load_from_db = load_from_db  # type: ignore[method-assign]
+    threads = [threading.Thread(target=scheduler.ensure_loaded) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert scheduler.assign("w") == "a"
+
+
+def test_assign_route_spreads_workers(client: FlaskClient, make_question: Any) -> None:
+    ids = {make_question(n)["id"] for n in range(2)}
+
+    first = client.get("/questions/assign?worker_id=w1").get_json()["id"]
+    second = client.get("/questions/assign?worker_id=w2").get_json()["id"]
+
+    assert {first, second} == ids
+
+
+def test_assign_route_skips_answered_questions(
+    client: FlaskClient, make_question: Any
+) -> None:
+    question = make_question()
+    client.post("/responses", json=response_data(question["id"], "w"))
+
+    assert client.get("/questions/assign?worker_id=w").status_code == 404
+    assert client.get("/questions/assign").status_code == 400
+
+
+def test_answer_stored_by_another_process_is_skipped(
+    app: Flask, client: FlaskClient, make_question: Any
+) -> None:
+    ids = [make_question(n)["id"] for n in range(2)]
+    first = client.get("/questions/assign?worker_id=w").get_json()["id"]
+    # Stored by another process, so this one's scheduler never hears of it
+    with app.app_context():
+        row = response_data(first, "w") | {"time": utcnow()}
+        db.session.add(UserResponse(**row))
+        db.session.commit()
+
+    second = client.get("/questions/assign?worker_id=w").get_json()["id"]
+
+    assert second != first and {first, second} == set(ids)
+    assert scheduler._counts[first] == 1
+
+
+def test_question_deleted_by_another_process_is_dropped(
+    app: Flask, client: FlaskClient, make_question: Any
+) -> None:
+    ids = [make_question(n)["id"] for n in range(2)]
+    first = client.get("/questions/assign?worker_id=w").get_json()["id"]
+    with app.app_context():
+        db.session.execute(
+            db.delete(ClassificationQuestion).where(ClassificationQuestion.id == first)
+        )
+        db.session.commit()
+    # The deleting process can only invalidate its own cache
+    question_cache.clear()
+
+    second = client.get("/questions/assign?worker_id=w").get_json()["id"]
+
+    assert {first, second} == set(ids)
+    assert first not in scheduler._counts
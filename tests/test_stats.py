@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from conftest import response_data
+from flask import Flask
+from flask.testing import FlaskClient
+
+from models import UserResponse, db
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def seeded(app: Flask, make_question: Any) -> Dict[str, Any]:
+    # Three questions, the last one without responses; times are set explicitly so
+    # the spans are known
+    ids = sorted(make_question(n)["id"] for n in range(3))
+    answers = [
+        (ids[0], "w1", True, True, 0),
+        (ids[0], "w2", False, True, 30),
+        (ids[0], "w3", True, False, 90),
+        (ids[1], "w1", False, False, 600),
+    ]
+    with app.app_context():
+        for question_id, worker_id, faithful, relevant, seconds in answers:
+            row = response_data(question_id, worker_id) | {
+                "is_faithful": faithful,
+                "is_relevant": relevant,
+                "time": START + timedelta(seconds=seconds),
+            }
+            db.session.add(UserResponse(**row))
+        db.session.commit()
+    return {"ids": ids}
+
+
+def _by(rows: List[Dict[str, Any]], key: str) -> Dict[str, Dict[str, Any]]:
+    return {row[key]: row for row in rows}
+
+
+def test_summary(client: FlaskClient, seeded: Dict[str, Any]) -> None:
+    summary = client.get("/stats").get_json()
+
+    assert summary == {
+        "questions": 3,
+        "responses": 4,
+        "workers": 3,
+        "first_response": "2024-01-01T12:00:00",
+        "last_response": "2024-01-01T12:10:00",
+        "span_seconds": 600.0,
+    }
+
+
+def test_summary_of_an_empty_database(client: FlaskClient) -> None:
+    summary = client.get("/stats").get_json()
+
+    assert summary["questions"] == 0 and summary["responses"] == 0
+    assert summary["first_response"] is None
+    assert summary["span_seconds"] is None
+
+
+def test_question_stats_keep_questions_without_responses(
+    client: FlaskClient, seeded: Dict[str, Any]
+) -> None:
+    first, second, unanswered = seeded["ids"]
+
+    rows = client.get("/stats/questions").get_json()
+
+    assert [row["question_id"] for row in rows] == seeded["ids"]
+    stats = _by(rows, "question_id")
+    assert stats[first]["responses"] == 3
+    assert stats[first]["faithful_fraction"] == pytest.approx(2 / 3)
+    assert stats[first]["relevant_fraction"] == pytest.approx(2 / 3)
+    assert stats[first]["first_response"] == "2024-01-01T12:00:00"
+    assert stats[first]["last_response"] == "2024-01-01T12:01:30"
+    assert stats[second]["faithful_fraction"] == 0.0
+    assert stats[unanswered] == {
+        "question_id": unanswered,
+        "responses": 0,
+        "faithful_fraction": None,
+        "relevant_fraction": None,
+        "first_response": None,
+        "last_response": None,
+    }
+
+
+def test_worker_stats(client: FlaskClient, seeded: Dict[str, Any]) -> None:
+    rows = client.get("/stats/workers").get_json()
+
+    assert [row["worker_id"] for row in rows] == ["w1", "w2", "w3"]
+    stats = _by(rows, "worker_id")
+    assert stats["w1"]["responses"] == 2
+    assert stats["w1"]["span_seconds"] == 600.0
+    assert stats["w2"] == {
+        "worker_id": "w2",
+        "responses": 1,
+        "first_response": "2024-01-01T12:00:30",
+        "last_response": "2024-01-01T12:00:30",
+        "span_seconds": 0.0,
+    }